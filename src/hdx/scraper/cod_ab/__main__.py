@@ -5,6 +5,8 @@ Calls other functions that generate datasets that this script then creates in HD
 """
 
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
 from os.path import dirname, expanduser, join
 from shutil import rmtree
 
@@ -13,14 +15,18 @@ from hdx.facades.infer_arguments import facade
 from hdx.utilities.path import wheretostart_tempdir_batch
 from tqdm import tqdm
 
-from hdx.scraper.cod_ab import checks, download, formats, metadata, scores
-from hdx.scraper.cod_ab.cod_ab import CodAb
-from hdx.scraper.cod_ab.config import DEBUG, data_dir
-from hdx.scraper.cod_ab.utils import (
-    get_arcgis_update,
-    get_hdx_update,
-    get_iso3_list,
+from hdx.scraper.cod_ab import (
+    checks,
+    download,
+    formats,
+    freshness,
+    metadata,
+    scores,
 )
+from hdx.scraper.cod_ab.cod_ab import CodAb
+from hdx.scraper.cod_ab.config import DEBUG, WORKERS, data_dir
+from hdx.scraper.cod_ab.store import LayerStore
+from hdx.scraper.cod_ab.utils import RequestCounts, client_stats, get_iso3_list
 
 logger = logging.getLogger(__name__)
 
@@ -29,54 +35,199 @@ _UPDATED_BY_SCRIPT = "HDX Scraper: COD-AB"
 PASS = 1.0
 
 
-def main() -> None:
-    """Generate datasets and create them in HDX."""
+def create_iso3(iso3: str, batch: str, *, use_cache: bool = True) -> bool:
+    """Runs every stage for a single location and creates the dataset in HDX.
+
+    Args:
+        iso3: ISO3 code of the location to process.
+        batch: HDX batch id shared by every dataset created in this run.
+        use_cache: Whether to reuse exported outputs from the artifact cache.
+
+    Returns:
+        True if a dataset was created in HDX, otherwise false.
+    """
+    iso3_dir = data_dir / iso3.lower()
+    try:
+        reuse_downloads = DEBUG and iso3_dir.exists()
+        iso3_dir.mkdir(exist_ok=True, parents=True)
+        meta_dict = metadata.main(iso3)
+        if not reuse_downloads:
+            store = LayerStore(iso3)
+            download.main(iso3, store)
+            formats.main(iso3, store, use_cache=use_cache)
+            checks.main(iso3, store)
+        score = scores.main(iso3)
+        if (
+            score == PASS
+            and meta_dict
+            and meta_dict.get("all", {}).get("date_established")
+            and meta_dict.get("all", {}).get("date_reviewed")
+        ):
+            cod_ab = CodAb()
+            dataset = cod_ab.generate_dataset(meta_dict, iso3)
+            dataset.update_from_yaml(
+                path=join(dirname(__file__), "config", "hdx_dataset_static.yaml"),
+            )
+            dataset.create_in_hdx(
+                remove_additional_resources=True,
+                match_resource_order=False,
+                hxl_update=False,
+                updated_by_script=_UPDATED_BY_SCRIPT,
+                batch=batch,
+            )
+            logger.info("Pass: %s", iso3)
+            return True
+        logger.info("Fail: %s", iso3)
+        return False
+    finally:
+        if not DEBUG:
+            rmtree(iso3_dir, ignore_errors=True)
+
+
+def process_iso3(
+    iso3: str,
+    batch: str,
+    *,
+    use_cache: bool = True,
+) -> tuple[str | None, RequestCounts]:
+    """Processes a single location, counting the HTTP requests it made.
+
+    Errors are caught here rather than raised, so that the requests of a failed
+    location are still counted, and so that nothing needs pickling back from a worker
+    process except its message.
+
+    Args:
+        iso3: ISO3 code of the location to process.
+        batch: HDX batch id shared by every dataset created in this run.
+        use_cache: Whether to reuse exported outputs from the artifact cache.
+
+    Returns:
+        Tuple of the error message, or None if the location didn't raise one, and the
+        HTTP requests made for the location.
+    """
+    start = client_stats.counts()
+    error = None
+    try:
+        create_iso3(iso3, batch, use_cache=use_cache)
+    except Exception as err:
+        logger.exception("Error: %s", iso3)
+        error = repr(err)
+    counts = client_stats.counts() - start
+    logger.info("HTTP %s: %s", iso3, counts)
+    return error, counts
+
+
+def run_serial(
+    iso3_list: list[str],
+    batch: str,
+    *,
+    use_cache: bool = True,
+) -> tuple[dict[str, str], RequestCounts]:
+    """Processes locations one after another in the current process.
+
+    Args:
+        iso3_list: ISO3 codes of the locations to process.
+        batch: HDX batch id shared by every dataset created in this run.
+        use_cache: Whether to reuse exported outputs from the artifact cache.
+
+    Returns:
+        Tuple of a dictionary of ISO3 codes which raised an error, with the error
+        message, and the HTTP requests made for every location.
+    """
+    failures = {}
+    total = RequestCounts()
+    pbar = tqdm(iso3_list)
+    for iso3 in pbar:
+        pbar.set_postfix_str(iso3)
+        error, counts = process_iso3(iso3, batch, use_cache=use_cache)
+        total += counts
+        if error:
+            failures[iso3] = error
+    return failures, total
+
+
+def run_parallel(
+    iso3_list: list[str],
+    batch: str,
+    workers: int,
+    *,
+    use_cache: bool = True,
+) -> tuple[dict[str, str], RequestCounts]:
+    """Processes locations as isolated tasks in a pool of worker processes.
+
+    Workers are forked from the current process so that the HDX configuration and
+    heavy imports (GeoPandas, ICU, pycountry) are inherited rather than reloaded, and
+    each worker is reused for many locations.
+
+    Args:
+        iso3_list: ISO3 codes of the locations to process.
+        batch: HDX batch id shared by every dataset created in this run.
+        workers: Number of worker processes.
+        use_cache: Whether to reuse exported outputs from the artifact cache.
+
+    Returns:
+        Tuple of a dictionary of ISO3 codes which raised an error, with the error
+        message, and the HTTP requests made by every worker.
+    """
+    failures = {}
+    total = RequestCounts()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("fork"),
+    ) as executor:
+        futures = {
+            executor.submit(process_iso3, iso3, batch, use_cache=use_cache): iso3
+            for iso3 in iso3_list
+        }
+        pbar = tqdm(as_completed(futures), total=len(futures))
+        for future in pbar:
+            iso3 = futures[future]
+            pbar.set_postfix_str(iso3)
+            try:
+                error, counts = future.result()
+            except Exception as err:
+                logger.exception("Error: %s", iso3)
+                failures[iso3] = repr(err)
+                continue
+            total += counts
+            if error:
+                failures[iso3] = error
+    return failures, total
+
+
+def main(workers: int = WORKERS, no_cache: bool = False) -> None:
+    """Generate datasets and create them in HDX.
+
+    Args:
+        workers: Number of locations to process in parallel.
+        no_cache: Rebuild every exported output instead of reusing cached ones.
+    """
     if not User.check_current_user_organization_access("ocha-fiss", "create_dataset"):
         raise PermissionError(
             "API Token does not give access to <insert org title> organisation!",
         )
 
     with wheretostart_tempdir_batch(folder=_USER_AGENT_LOOKUP) as info:
-        iso3_list = get_iso3_list()
-        pbar = tqdm(iso3_list)
-        for iso3 in pbar:
-            pbar.set_postfix_str(iso3)
-            iso3_dir = data_dir / iso3.lower()
-            arcgis_update = get_arcgis_update(iso3)
-            hdx_update = get_hdx_update(iso3)
-            if arcgis_update >= hdx_update:
-                iso3_dir.mkdir(exist_ok=True, parents=True)
-                meta_dict = metadata.main(iso3)
-                if DEBUG and not iso3_dir.exists():
-                    download.main(iso3)
-                    formats.main(iso3)
-                    checks.main(iso3)
-                score = scores.main(iso3)
-                if (
-                    score == PASS
-                    and meta_dict
-                    and meta_dict.get("all", {}).get("date_established")
-                    and meta_dict.get("all", {}).get("date_reviewed")
-                ):
-                    cod_ab = CodAb()
-                    dataset = cod_ab.generate_dataset(meta_dict, iso3)
-                    dataset.update_from_yaml(
-                        path=join(
-                            dirname(__file__), "config", "hdx_dataset_static.yaml"
-                        ),
-                    )
-                    dataset.create_in_hdx(
-                        remove_additional_resources=True,
-                        match_resource_order=False,
-                        hxl_update=False,
-                        updated_by_script=_UPDATED_BY_SCRIPT,
-                        batch=info["batch"],
-                    )
-                    logger.info("Pass: %s", iso3)
-                else:
-                    logger.info("Fail: %s", iso3)
-                if not DEBUG:
-                    rmtree(iso3_dir, ignore_errors=True)
+        iso3_list = freshness.main(get_iso3_list())
+        start = client_stats.counts()
+        if workers > 1:
+            failures, total = run_parallel(
+                iso3_list,
+                info["batch"],
+                workers,
+                use_cache=not no_cache,
+            )
+        else:
+            failures, total = run_serial(
+                iso3_list,
+                info["batch"],
+                use_cache=not no_cache,
+            )
+    logger.info("HTTP: %s", start + total)
+    if failures:
+        for iso3, error in sorted(failures.items()):
+            logger.error("%s: %s", iso3, error)
+        raise RuntimeError(f"Failed locations: {', '.join(sorted(failures))}")
 
 
 if __name__ == "__main__":
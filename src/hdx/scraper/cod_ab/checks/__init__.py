@@ -1,9 +1,11 @@
-from geopandas import read_parquet
+from logging import getLogger
+
 from pandas import DataFrame
 
 from . import (
     attribute_match,
     dates,
+    executor,
     geometry_gaps,
     geometry_overlaps_self,
     geometry_valid,
@@ -13,14 +15,17 @@ from . import (
     table_other,
     table_pcodes,
 )
+from .context import LayerContext
 from hdx.scraper.cod_ab.config import ADMIN_LEVELS, checks_config, data_dir
+from hdx.scraper.cod_ab.store import LayerStore
+
+logger = getLogger(__name__)
 
 
-def create_output(iso3: str, checks: list) -> None:
-    """Create CSV from registered checks."""
+def create_output(iso3: str, results: list[list[dict]]) -> None:
+    """Create CSV from the rows of each check."""
     output = None
-    for _, results in checks:
-        rows = [row for result in results for row in result]
+    for rows in results:
         partial = DataFrame(rows).convert_dtypes()
         if output is None or output.empty:
             output = partial
@@ -31,48 +36,44 @@ def create_output(iso3: str, checks: list) -> None:
         output.to_csv(dest, encoding="utf-8-sig", index=False)
 
 
-def main(iso3: str) -> None:
+def main(iso3: str, store: LayerStore) -> None:
     """Summarizes and describes the data contained within downloaded boundaries.
 
-    1. Create an iterable with each item containing the following (check_function,
-    results_list).
-
-    2. Iterate through ISO3 values, creating a list of GeoDataFrames containing admin
-    levels 0-n.
-
-    3. Iterate through the check functions, passing to them the results list for that
-    check as well as boundary data needed for checking.
+    1. Create a list of GeoDataFrames containing admin levels 0-n, wrapped in a
+    LayerContext which computes derived geometries, such as valid geometries and
+    spatial indexes, once and shares them between checks.
 
-    4. When all checks have run against the ISO3's GeoDataFrames, they are released from
-    memory and a new ISO3 is loaded in.
+    2. Run every check on every admin level as a separate unit on a thread pool. A
+    unit waits for the units its check depends on, such as the same check of the
+    parent level.
 
-    5. After all the checks have been performed for all ISO3 values, join the check
-    tables together by ISO3 and admin level.
+    3. Collect the rows of each check in order of admin level, and join the check
+    tables together by ISO3 and admin level, in the order the checks are listed.
 
-    6. Output the final result as a single table: "data/tables/checks.csv".
+    4. Output the final result as a single table: "{iso3}_checks.csv".
     """
     checks = [
-        (geometry_valid, []),
-        (geometry_gaps, []),
-        (geometry_overlaps_self, []),
-        (geometry_within_parent, []),
-        (attribute_match, []),
-        (table_pcodes, []),
-        (table_names, []),
-        (dates, []),
-        (languages, []),
-        (table_other, []),
+        geometry_valid,
+        geometry_gaps,
+        geometry_overlaps_self,
+        geometry_within_parent,
+        attribute_match,
+        table_pcodes,
+        table_names,
+        dates,
+        languages,
+        table_other,
     ]
     gdfs = []
     levels = ADMIN_LEVELS
     if iso3 in checks_config["max_level"]:
         levels = checks_config["max_level"][iso3]
     for level in range(levels + 1):
-        file_path = data_dir / iso3.lower() / f"{iso3.lower()}_admin{level}.parquet"
-        if file_path.exists():
-            gdf = read_parquet(file_path)
-            gdfs.append(gdf)
-    for function, results in checks:
-        result = function.main(iso3, gdfs)
-        results.append(result)
-    create_output(iso3, checks)
+        name = f"{iso3.lower()}_admin{level}"
+        if name in store:
+            gdfs.append(store.gdf(name))
+    context = LayerContext(iso3, gdfs)
+    results = executor.run(iso3, context, checks)
+    for name, usage in context.usage.items():
+        logger.debug("Check %s %s: %s", iso3, name, sorted(usage))
+    create_output(iso3, results)
@@ -0,0 +1,157 @@
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any
+
+import numpy as np
+from geopandas import GeoDataFrame, GeoSeries
+from pandas import Series
+from shapely import STRtree, coverage_invalid_edges, prepare
+
+from .hierarchy import Hierarchy
+from hdx.scraper.cod_ab.config import EPSG_WGS84, GEOJSON_PRECISION
+from hdx.scraper.cod_ab.utils import get_epsg_ease
+
+current_check: ContextVar[str | None] = ContextVar("current_check", default=None)
+
+
+class LayerContext:
+    """Admin levels of an ISO3, with derived geometries shared by every check.
+
+    Each derived artifact of a level, such as its valid geometry or spatial index, is
+    computed the first time a check asks for it and reused by every later check. The
+    artifacts used by each check are recorded in `usage`, and the row produced by each
+    check of a level in `rows`, for checks which depend on another. The attributes of
+    every level are indexed up front in `hierarchy`.
+    """
+
+    def __init__(self, iso3: str, gdfs: list[GeoDataFrame]) -> None:
+        """Create a context for the levels of an ISO3.
+
+        Args:
+            iso3: ISO3 code of the location.
+            gdfs: List of GeoDataFrames, with the item at index 0 corresponding to
+            admin level 0, index 1 to admin level 1, etc.
+        """
+        self.iso3 = iso3
+        self.gdfs = gdfs
+        self.artifacts: dict[tuple[str, int], Any] = {}
+        self.locks: defaultdict[tuple[str, int], Lock] = defaultdict(Lock)
+        self.lock = Lock()
+        self.usage: defaultdict[str, set[str]] = defaultdict(set)
+        self.rows: dict[tuple[str, int], dict | None] = {}
+        self.hierarchy = Hierarchy(gdfs)
+
+    @contextmanager
+    def track(self, check: str) -> Iterator[None]:
+        """Record the artifacts used within the block against a check."""
+        token = current_check.set(check)
+        try:
+            yield
+        finally:
+            current_check.reset(token)
+
+    def row(self, check: str, level: int) -> dict | None:
+        """Get the row produced by a check of a level, which must have finished."""
+        return self.rows[(check, level)]
+
+    def get(self, name: str, level: int, factory: Callable[[], Any]) -> Any:
+        """Get an artifact of a level, computing it once.
+
+        Args:
+            name: Name of the artifact.
+            level: Admin level.
+            factory: Function computing the artifact.
+
+        Returns:
+            The artifact.
+        """
+        key = (name, level)
+        with self.lock:
+            check = current_check.get()
+            if check:
+                self.usage[check].add(name)
+            lock = self.locks[key]
+        with lock:
+            if key not in self.artifacts:
+                self.artifacts[key] = factory()
+            return self.artifacts[key]
+
+    def wgs84(self, level: int) -> GeoSeries:
+        """Geometry of a level in WGS84."""
+        return self.get(
+            "wgs84",
+            level,
+            lambda: self.gdfs[level].geometry.to_crs(EPSG_WGS84),
+        )
+
+    def bounds(self, level: int) -> list[float]:
+        """Bounding box of a level in decimal degrees."""
+        return self.get(
+            "bounds",
+            level,
+            lambda: [
+                round(x, GEOJSON_PRECISION) for x in self.wgs84(level).total_bounds
+            ],
+        )
+
+    def equal_area(self, level: int) -> GeoSeries:
+        """Geometry of a level in the EASE-Grid 2.0 projection for its latitudes."""
+
+        def factory() -> GeoSeries:
+            _, min_y, _, max_y = self.bounds(level)
+            return self.gdfs[level].geometry.to_crs(get_epsg_ease(min_y, max_y))
+
+        return self.get("equal_area", level, factory)
+
+    def valid_reason(self, level: int) -> Series:
+        """Reason each geometry of a level is valid or invalid."""
+        return self.get(
+            "valid_reason",
+            level,
+            lambda: self.gdfs[level].geometry.is_valid_reason(),
+        )
+
+    def valid(self, level: int) -> GeoSeries:
+        """Geometry of a level, made valid."""
+        return self.get(
+            "valid",
+            level,
+            lambda: self.gdfs[level].geometry.make_valid(),
+        )
+
+    def parts(self, level: int) -> GeoSeries:
+        """Single-part geometries of a level, made valid.
+
+        Shapely marks arrays read-only while other threads use them, which get_parts
+        can't accept, so a copy of the valid geometry is exploded.
+        """
+        return self.get("parts", level, lambda: self.valid(level).copy().explode())
+
+    def invalid_edges(self, level: int) -> np.ndarray:
+        """Edges of each valid geometry of a level which break a polygonal coverage."""
+        return self.get(
+            "invalid_edges",
+            level,
+            lambda: coverage_invalid_edges(np.asarray(self.valid(level).array)),
+        )
+
+    def prepared(self, level: int) -> np.ndarray:
+        """Geometry of a level, prepared for repeated predicate tests."""
+
+        def factory() -> np.ndarray:
+            geometry = np.asarray(self.gdfs[level].geometry.array)
+            prepare(geometry)
+            return geometry
+
+        return self.get("prepared", level, factory)
+
+    def tree(self, level: int) -> STRtree:
+        """Spatial index of the geometry of a level."""
+        return self.get(
+            "tree",
+            level,
+            lambda: STRtree(np.asarray(self.gdfs[level].geometry.array)),
+        )
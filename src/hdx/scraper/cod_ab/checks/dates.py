@@ -1,9 +1,8 @@
-from geopandas import GeoDataFrame
-
+from .context import LayerContext
 from hdx.scraper.cod_ab.config import VALID_ON, VALID_TO
 
 
-def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
+def check(iso3: str, context: LayerContext, admin_level: int) -> dict:
     """Checks for unique date values within dataset.
 
     There are two date fields within each COD-AB, "valid_on" and "valid_to". "valid_on"
@@ -17,38 +16,36 @@ def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
 
     Args:
         iso3: ISO3 code of the current location being checked.
-        gdfs: List of GeoDataFrames, with the item at index 0 corresponding to admin
-        level 0, index 1 to admin level 1, etc.
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: Admin level to check.
 
     Returns:
-        List of results from this check to output as a CSV.
+        Check row to output as a CSV.
     """
-    check_results = []
-    for admin_level, gdf in enumerate(gdfs):
-        row = {
-            "iso3": iso3,
-            "level": admin_level,
-            "valid_on_type": None,
-            "valid_on_count": 0,
-            "valid_to_type": None,
-            "valid_to_exists": 0,
-            "valid_to_empty": 0,
-        }
-        try:
-            gdf_valid_on = gdf[~gdf[VALID_ON].isna()][VALID_ON].drop_duplicates()
-            row["valid_on_type"] = gdf[VALID_ON].dtype
-            for index, value in enumerate(gdf_valid_on):
-                row["valid_on_count"] += 1
-                if index == 0:
-                    row["valid_on"] = value
-                else:
-                    row[f"valid_on_{index}"] = value
-        except KeyError:
-            pass
-        if VALID_TO in gdf.columns:
-            row["valid_to_exists"] = 1
-            row["valid_to_type"] = gdf[VALID_TO].dtype
-            if gdf[VALID_TO].isna().all():
-                row["valid_to_empty"] = 1
-        check_results.append(row)
-    return check_results
+    gdf = context.gdfs[admin_level]
+    row = {
+        "iso3": iso3,
+        "level": admin_level,
+        "valid_on_type": None,
+        "valid_on_count": 0,
+        "valid_to_type": None,
+        "valid_to_exists": 0,
+        "valid_to_empty": 0,
+    }
+    try:
+        gdf_valid_on = gdf[~gdf[VALID_ON].isna()][VALID_ON].drop_duplicates()
+        row["valid_on_type"] = gdf[VALID_ON].dtype
+        for index, value in enumerate(gdf_valid_on):
+            row["valid_on_count"] += 1
+            if index == 0:
+                row["valid_on"] = value
+            else:
+                row[f"valid_on_{index}"] = value
+    except KeyError:
+        pass
+    if VALID_TO in gdf.columns:
+        row["valid_to_exists"] = 1
+        row["valid_to_type"] = gdf[VALID_TO].dtype
+        if gdf[VALID_TO].isna().all():
+            row["valid_to_empty"] = 1
+    return row
@@ -0,0 +1,84 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from types import ModuleType
+
+from .context import LayerContext
+from hdx.scraper.cod_ab.config import CHECK_WORKERS
+
+
+def get_name(check: ModuleType) -> str:
+    """Gets the name of a check from its module."""
+    return check.__name__.rpartition(".")[2]
+
+
+def get_dependencies(check: ModuleType, level: int) -> set[tuple[str, int]]:
+    """Gets the units a check of a level must wait for.
+
+    Checks declare DEPENDENCIES as pairs of a check name and an offset from the level,
+    so that ("languages", -1) is the languages check of the level above. Dependencies
+    on levels below 0 are ignored.
+    """
+    return {
+        (name, level + offset)
+        for name, offset in getattr(check, "DEPENDENCIES", [])
+        if level + offset >= 0
+    }
+
+
+def run_unit(
+    iso3: str,
+    context: LayerContext,
+    check: ModuleType,
+    level: int,
+) -> dict | None:
+    """Runs a check on a single level, recording the artifacts it uses."""
+    with context.track(get_name(check)):
+        return check.check(iso3, context, level)
+
+
+def run(iso3: str, context: LayerContext, checks: list[ModuleType]) -> list[list[dict]]:
+    """Runs every check on every level, as independent units on a thread pool.
+
+    GEOS releases the GIL within shapely's vectorized operations, so geometry checks
+    overlap with attribute checks without the cost of pickling layers to processes. A
+    unit is only submitted once the units it depends on have finished. Rows are merged
+    in the order of checks then levels, whatever order the units finish in.
+
+    Args:
+        iso3: ISO3 code of the location.
+        context: Admin levels of the location, with their derived geometries.
+        checks: Check modules, each with a `check` function.
+
+    Returns:
+        Rows of each check, in the order of checks.
+    """
+    levels = range(len(context.gdfs))
+    modules = {get_name(x): x for x in checks}
+    pending = {
+        (name, level): get_dependencies(check, level)
+        for name, check in modules.items()
+        for level in levels
+    }
+    running: dict[Future, tuple[str, int]] = {}
+    with ThreadPoolExecutor(max_workers=CHECK_WORKERS) as executor:
+        while pending or running:
+            for unit, dependencies in list(pending.items()):
+                if dependencies <= context.rows.keys():
+                    del pending[unit]
+                    name, level = unit
+                    future = executor.submit(
+                        run_unit,
+                        iso3,
+                        context,
+                        modules[name],
+                        level,
+                    )
+                    running[future] = unit
+            if not running:
+                raise RuntimeError(f"Unresolved check dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                context.rows[running.pop(future)] = future.result()
+    return [
+        [row for level in levels if (row := context.rows[(name, level)]) is not None]
+        for name in modules
+    ]
@@ -1,41 +1,86 @@
 from math import pi
 
-from geopandas import GeoDataFrame, GeoSeries
-from shapely import Polygon
+import numpy as np
+from geopandas import GeoSeries
+from shapely import (
+    area,
+    coverage_union_all,
+    get_interior_ring,
+    get_num_interior_rings,
+    get_parts,
+    get_type_id,
+    is_empty,
+    is_valid,
+    length,
+    polygons,
+    union_all,
+)
 
-from hdx.scraper.cod_ab.config import EPSG_EQUAL_AREA, METERS_PER_KM
+from .context import LayerContext
+from hdx.scraper.cod_ab.config import EPSG_EQUAL_AREA, METERS_PER_KM, POLYGON_TYPE_IDS
 
 
-def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
+def get_dissolved(geometry: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Dissolves the geometries of a layer into its parts.
+
+    Admin boundaries are usually a valid polygonal coverage, whose union only needs
+    the edges shared between polygons removed. A coverage union doesn't split rings
+    which touch at a vertex, so a gap touching the outside of the layer at a single
+    point becomes part of the shell of an invalid polygon instead of a hole. Such a
+    union, and anything else, such as overlapping polygons, falls back to a full
+    unary union.
+
+    Args:
+        geometry: Array of valid geometries.
+        edges: Invalid coverage edges of each geometry.
+
+    Returns:
+        Array of the parts of the union.
+    """
+    if np.isin(get_type_id(geometry), POLYGON_TYPE_IDS).all() and is_empty(edges).all():
+        union = coverage_union_all(geometry)
+        if is_valid(union):
+            return get_parts(union)
+    return get_parts(union_all(geometry))
+
+
+def get_interiors(geometry: np.ndarray) -> np.ndarray:
+    """Gets every interior ring of an array of polygons as a polygon."""
+    counts = get_num_interior_rings(geometry)
+    counts = np.where(counts < 0, 0, counts)
+    index = np.repeat(np.arange(len(geometry)), counts)
+    ring_index = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return polygons(get_interior_ring(geometry[index], ring_index))
+
+
+def check(iso3: str, context: LayerContext, admin_level: int) -> dict | None:
     """Check for the number of gaps between geometries.
 
     Args:
         iso3: ISO3 code of the current location being checked.
-        gdfs: List of GeoDataFrames, with the item at index 0 corresponding to admin
-        level 0, index 1 to admin level 1, etc.
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: Admin level to check.
 
     Returns:
-        List of check rows to be outputed as a CSV.
+        Check row to output as a CSV, or None if the level has no geometry.
     """
-    check_results = []
-    for admin_level, gdf in enumerate(gdfs):
-        row = {"iso3": iso3, "level": admin_level}
-        if gdf.active_geometry_name:
-            valid = gdf.copy()
-            valid.geometry = valid.geometry.make_valid()
-            interiors = valid.dissolve().explode().interiors.tolist()
-            polygons = [Polygon(x) for y in interiors for x in y]
-            if polygons:
-                geometry = GeoSeries(polygons, crs=gdf.crs).to_crs(EPSG_EQUAL_AREA)
-                thinness = geometry.map(lambda x: (4 * pi * x.area) / (x.length**2))
-                row |= {
-                    "geom_gap_area_km": geometry.area.min() / METERS_PER_KM,
-                    "geom_gap_thinness": thinness.min(),
-                }
-            else:
-                row |= {
-                    "geom_gap_area_km": None,
-                    "geom_gap_thinness": None,
-                }
-            check_results.append(row)
-    return check_results
+    gdf = context.gdfs[admin_level]
+    if not gdf.active_geometry_name:
+        return None
+    row = {"iso3": iso3, "level": admin_level}
+    valid = context.valid(admin_level)
+    edges = context.invalid_edges(admin_level)
+    interiors = get_interiors(get_dissolved(np.asarray(valid.array), edges))
+    if len(interiors):
+        geometry = GeoSeries(interiors, crs=gdf.crs).to_crs(EPSG_EQUAL_AREA).array
+        thinness = (4 * pi * area(geometry)) / (length(geometry) ** 2)
+        row |= {
+            "geom_gap_area_km": area(geometry).min() / METERS_PER_KM,
+            "geom_gap_thinness": thinness.min(),
+        }
+    else:
+        row |= {
+            "geom_gap_area_km": None,
+            "geom_gap_thinness": None,
+        }
+    return row
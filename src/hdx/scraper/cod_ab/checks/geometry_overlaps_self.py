@@ -1,30 +1,78 @@
-from geopandas import GeoDataFrame
+import numpy as np
+from shapely import STRtree, get_type_id, is_empty, is_valid
 
+from .context import LayerContext
+from hdx.scraper.cod_ab.config import POLYGON_TYPE_IDS
 
-def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
+
+def get_flagged(geometry: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Gets which geometries may overlap another, using coverage validation.
+
+    A polygon overlapping another always has an edge within the interior of the other,
+    which coverage validation reports as an invalid edge. Geometries without invalid
+    edges can't overlap anything. Geometries which aren't valid polygons can't be
+    validated as a coverage, so are always flagged.
+
+    Args:
+        geometry: Array of geometries.
+        edges: Invalid coverage edges of each geometry, once made valid.
+
+    Returns:
+        Boolean array, true where a geometry needs checking for overlaps.
+    """
+    polygonal = np.isin(get_type_id(geometry), POLYGON_TYPE_IDS) & is_valid(geometry)
+    return ~is_empty(geometry) & (~polygonal | ~is_empty(edges))
+
+
+def get_overlap_count(geometry: np.ndarray, edges: np.ndarray, tree: STRtree) -> int:
+    """Counts the pairs of geometries which overlap.
+
+    Only flagged geometries are queried against the spatial index with the exact
+    predicate, and each pair is counted once, as (i, j) with i < j.
+
+    Args:
+        geometry: Array of geometries.
+        edges: Invalid coverage edges of each geometry, once made valid.
+        tree: Spatial index of the geometries.
+
+    Returns:
+        Number of overlapping pairs.
+    """
+    index = np.flatnonzero(get_flagged(geometry, edges))
+    if not len(index):
+        return 0
+    left, right = tree.query(geometry[index], predicate="overlaps")
+    pairs = np.sort([index[left], right], axis=0)
+    pairs = pairs[:, pairs[0] != pairs[1]]
+    return len(np.unique(pairs, axis=1).T)
+
+
+def check(iso3: str, context: LayerContext, admin_level: int) -> dict | None:
     """Check for the number of self-overlaping geometries.
 
-    Conducting a spatial join predicated by overlaps is very computationally expensive.
-    This module has been separated out from other geometry checks so that it can be made
-    optional.
+    Rather than querying every geometry against every other, the layer is validated
+    as a polygonal coverage first, and only geometries with invalid edges are queried
+    against the spatial index for overlaps. Layers which form a valid coverage, as
+    most admin boundaries do, need no pairwise queries at all.
 
     Args:
         iso3: ISO3 code of the current location being checked.
-        gdfs: List of GeoDataFrames, with the item at index 0 corresponding to admin
-        level 0, index 1 to admin level 1, etc.
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: Admin level to check.
 
     Returns:
-        List of check rows to be outputed as a CSV.
+        Check row to output as a CSV, or None if the level has no geometry.
     """
-    check_results = []
-    for admin_level, gdf in enumerate(gdfs):
-        if gdf.active_geometry_name:
-            overlaps = gdf.sjoin(gdf, predicate="overlaps")
-            overlap_count = len(overlaps[overlaps.index != overlaps.index_right].index)
-            row = {
-                "iso3": iso3,
-                "level": admin_level,
-                "geom_overlaps_self": overlap_count / 2,
-            }
-            check_results.append(row)
-    return check_results
+    gdf = context.gdfs[admin_level]
+    if not gdf.active_geometry_name:
+        return None
+    overlap_count = get_overlap_count(
+        np.asarray(gdf.geometry.array),
+        context.invalid_edges(admin_level),
+        context.tree(admin_level),
+    )
+    return {
+        "iso3": iso3,
+        "level": admin_level,
+        "geom_overlaps_self": overlap_count,
+    }
@@ -1,16 +1,13 @@
-from geopandas import GeoDataFrame
-
+from .context import LayerContext
 from hdx.scraper.cod_ab.config import (
     EPSG_WGS84,
-    GEOJSON_PRECISION,
     METERS_PER_KM,
     POLYGON,
     VALID_GEOMETRY,
 )
-from hdx.scraper.cod_ab.utils import get_epsg_ease
 
 
-def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
+def check(iso3: str, context: LayerContext, admin_level: int) -> dict:
     """Check properties associated with geometry.
 
     The first section of checks look at validity criteria:
@@ -30,51 +27,42 @@ def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
 
     Args:
         iso3: ISO3 code of the current location being checked.
-        gdfs: List of GeoDataFrames, with the item at index 0 corresponding to admin
-        level 0, index 1 to admin level 1, etc.
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: Admin level to check.
 
     Returns:
-        List of check rows to be outputed as a CSV.
+        Check row to output as a CSV.
     """
-    check_results = []
-    for admin_level, gdf in enumerate(gdfs):
-        row = {"iso3": iso3, "level": admin_level}
-        if gdf.active_geometry_name:
-            min_x, min_y, max_x, max_y = [
-                round(x, GEOJSON_PRECISION)
-                for x in gdf.geometry.to_crs(EPSG_WGS84).total_bounds
-            ]
-            epsg_ease = get_epsg_ease(min_y, max_y)
-            area = gdf.geometry.to_crs(epsg_ease).area.sum()
-            invalid_reason = ", ".join(
-                {
-                    reason.split("[")[0]
-                    for reason in gdf.geometry.is_valid_reason()
-                    if reason != VALID_GEOMETRY
-                },
-            )
-            row |= {
-                "geom_count": len(gdf.index),
-                "geom_empty": len(
-                    gdf[gdf.geometry.is_empty | gdf.geometry.isna()].index,
-                ),
-                "geom_not_polygon": len(
-                    gdf[~gdf.geometry.geom_type.str.contains(POLYGON)].index,
-                ),
-                "geom_has_triangle": (
-                    gdf.make_valid().explode().geometry.count_coordinates().le(4).sum()
-                ),
-                "geom_has_z": len(gdf[gdf.geometry.has_z].index),
-                "geom_invalid": len(gdf[~gdf.geometry.is_valid].index),
-                "geom_invalid_reason": invalid_reason,
-                "geom_proj": gdf.geometry.crs.to_epsg() or EPSG_WGS84,
-                "geom_min_x": min_x,
-                "geom_min_y": min_y,
-                "geom_max_x": max_x,
-                "geom_max_y": max_y,
-                "geom_area_km": round(area / METERS_PER_KM, 5),
-            }
-            if "area_sqkm" in gdf.columns:
-                row["geom_area_km_attr"] = gdf["area_sqkm"].sum()
-        check_results.append(row)
-    return check_results
+    gdf = context.gdfs[admin_level]
+    row = {"iso3": iso3, "level": admin_level}
+    if gdf.active_geometry_name:
+        min_x, min_y, max_x, max_y = context.bounds(admin_level)
+        area = context.equal_area(admin_level).area.sum()
+        reasons = context.valid_reason(admin_level)
+        invalid_reason = ", ".join(
+            {reason.split("[")[0] for reason in reasons if reason != VALID_GEOMETRY},
+        )
+        row |= {
+            "geom_count": len(gdf.index),
+            "geom_empty": len(
+                gdf[gdf.geometry.is_empty | gdf.geometry.isna()].index,
+            ),
+            "geom_not_polygon": len(
+                gdf[~gdf.geometry.geom_type.str.contains(POLYGON)].index,
+            ),
+            "geom_has_triangle": (
+                context.parts(admin_level).count_coordinates().le(4).sum()
+            ),
+            "geom_has_z": len(gdf[gdf.geometry.has_z].index),
+            "geom_invalid": reasons.ne(VALID_GEOMETRY).sum(),
+            "geom_invalid_reason": invalid_reason,
+            "geom_proj": gdf.geometry.crs.to_epsg() or EPSG_WGS84,
+            "geom_min_x": min_x,
+            "geom_min_y": min_y,
+            "geom_max_x": max_x,
+            "geom_max_y": max_y,
+            "geom_area_km": round(area / METERS_PER_KM, 5),
+        }
+        if "area_sqkm" in gdf.columns:
+            row["geom_area_km_attr"] = gdf["area_sqkm"].sum()
+    return row
@@ -1,73 +1,139 @@
-from geopandas import GeoDataFrame
+import numpy as np
+from pandas import DataFrame, Series
+from shapely import covers, is_empty
 
+from .context import LayerContext
+from hdx.scraper.cod_ab.config import WITHIN_PARENT_PCODES
 from hdx.scraper.cod_ab.utils import get_name_columns, get_pcode_columns
 
 
 def check_nesting(
     row: dict,
-    gdf: GeoDataFrame,
+    context: LayerContext,
     admin_level: int,
-    within: GeoDataFrame,
+    index: np.ndarray,
 ) -> dict[str, int | str]:
     """Checks whether nested polygon contains all the same attributes as its parent.
 
     Args:
         row: Check result for current layer.
-        gdf: layer GeoDataFrame.
+        context: Admin levels of the location, with their derived geometries.
         admin_level: layer admin level.
-        within: layer GeoDataFrame join with its parent's attributes.
+        index: pairs of positions in the layer and the parent it falls within.
 
     Returns:
         Check result for current layer.
     """
+    hierarchy = context.hierarchy
+    gdf = context.gdfs[admin_level]
+    parent = hierarchy.levels[admin_level - 1]
     pcode_columns = get_pcode_columns(gdf, admin_level)
     name_columns = get_name_columns(gdf, admin_level)
     for name, columns in [("name", name_columns), ("pcode", pcode_columns)]:
         for column in columns:
-            column_left = column + "_left"
-            column_right = column + "_right"
-            if all(x in within.columns for x in [column_left, column_right]):
-                same_value = (
-                    within[column_left]
-                    .fillna("")
-                    .eq(within[column_right].fillna(""))
-                    .sum()
+            if column in parent.columns:
+                row[f"geom_within_{name}_mismatch"] += hierarchy.get_mismatched(
+                    admin_level,
+                    index,
+                    column,
                 )
-                row[f"geom_within_{name}_mismatch"] += len(within.index) - same_value
     return row
 
 
-def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
+def get_declared(
+    attributes: DataFrame,
+    parent: DataFrame,
+    admin_level: int,
+) -> np.ndarray:
+    """Pairs each geometry with the parent declared by its P-Code.
+
+    Geometries without a P-Code for the parent level, or whose P-Code doesn't match
+    exactly one parent, are left unpaired.
+
+    Args:
+        attributes: layer attributes.
+        parent: parent layer attributes.
+        admin_level: layer admin level.
+
+    Returns:
+        Pairs of positions in the layer and its parent.
+    """
+    column = f"adm{admin_level - 1}_pcode"
+    if column not in attributes.columns or column not in parent.columns:
+        return np.empty((2, 0), dtype=np.intp)
+    pcodes = parent[column]
+    unique = pcodes.notna() & ~pcodes.duplicated(keep=False)
+    lookup = Series(np.flatnonzero(unique), index=pcodes[unique].to_numpy())
+    declared = attributes[column].map(lookup).to_numpy(dtype=float, na_value=np.nan)
+    left = np.flatnonzero(~np.isnan(declared))
+    return np.array([left, declared[left].astype(np.intp)])
+
+
+def get_within(context: LayerContext, admin_level: int) -> np.ndarray:
+    """Pairs each geometry of a level with the parents it falls within.
+
+    Each geometry is first tested against the parent declared by its P-Code, with a
+    single vectorized covers test against prepared parents. Only geometries which
+    aren't covered by their declared parent are queried against the spatial index of
+    the parent level, so a well nested layer needs one test per geometry rather than
+    one per intersecting parent.
+
+    Args:
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: layer admin level.
+
+    Returns:
+        Pairs of positions in the layer and its parent.
+    """
+    gdf = context.gdfs[admin_level]
+    geometry = np.asarray(gdf.geometry.array)
+    declared = np.empty((2, 0), dtype=np.intp)
+    if WITHIN_PARENT_PCODES:
+        left, right = get_declared(
+            context.hierarchy.levels[admin_level],
+            context.hierarchy.levels[admin_level - 1],
+            admin_level,
+        )
+        parents = context.prepared(admin_level - 1)
+        covered = covers(parents[right], geometry[left]) & ~is_empty(geometry[left])
+        declared = np.array([left[covered], right[covered]])
+    remaining = np.setdiff1d(np.arange(len(geometry)), declared[0])
+    left, right = context.tree(admin_level - 1).query(
+        geometry[remaining],
+        predicate="within",
+    )
+    return np.concatenate([declared, [remaining[left], right]], axis=1)
+
+
+def check(iso3: str, context: LayerContext, admin_level: int) -> dict:
     """Check for the number of geometries within a parent layer.
 
     If a dataset is perfectly hierarchally nested, each geometry will fall within a
-    parent geometry.
+    parent geometry. Geometries are paired with parents by P-Code where possible,
+    falling back to a spatial query for the rest.
 
     Args:
         iso3: ISO3 code of the current location being checked.
-        gdfs: List of GeoDataFrames, with the item at index 0 corresponding to admin
-        level 0, index 1 to admin level 1, etc.
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: Admin level to check.
 
     Returns:
-        List of check rows to be outputed as a CSV.
+        Check row to output as a CSV.
     """
-    check_results = []
-    for admin_level, gdf in enumerate(gdfs):
-        row = {
-            "iso3": iso3,
-            "level": admin_level,
-            "geom_not_within_parent": 0,
-            "geom_within_name_mismatch": 0,
-            "geom_within_pcode_mismatch": 0,
-        }
-        if (
-            admin_level > 0
-            and gdf.active_geometry_name
-            and gdfs[admin_level - 1].active_geometry_name
-        ):
-            parent = gdfs[admin_level - 1]
-            within = gdf.sjoin(parent, predicate="within")
-            row["geom_not_within_parent"] = len(gdf.index) - len(within.index)
-            row = check_nesting(row, gdf, admin_level, within)
-        check_results.append(row)
-    return check_results
+    gdf = context.gdfs[admin_level]
+    row = {
+        "iso3": iso3,
+        "level": admin_level,
+        "geom_not_within_parent": 0,
+        "geom_within_name_mismatch": 0,
+        "geom_within_pcode_mismatch": 0,
+    }
+    if (
+        admin_level > 0
+        and gdf.active_geometry_name
+        and context.gdfs[admin_level - 1].active_geometry_name
+    ):
+        index = get_within(context, admin_level)
+        row["geom_not_within_parent"] = len(gdf.index) - index.shape[1]
+        row = check_nesting(row, context, admin_level, index)
+    return row
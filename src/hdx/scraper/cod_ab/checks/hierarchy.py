@@ -0,0 +1,85 @@
+import numpy as np
+from geopandas import GeoDataFrame
+from pandas import DataFrame, Series
+
+from hdx.scraper.cod_ab.config import ADMIN_LEVELS
+from hdx.scraper.cod_ab.utils import get_name_columns, get_pcode_columns
+
+
+def get_text(series: Series) -> np.ndarray:
+    """Gets the values of a column as strings, empty where not a non-blank string."""
+    values = [x.strip() and x if isinstance(x, str) else "" for x in series]
+    return np.array(values, dtype=np.dtypes.StringDType())
+
+
+class Hierarchy:
+    """Attribute-only index of the admin hierarchy of an ISO3.
+
+    Built once from the P-Code and name columns of every level, without geometry, so
+    that checks comparing a level with its parent look values up in small frames
+    rather than merging or joining whole GeoDataFrames.
+    """
+
+    def __init__(self, gdfs: list[GeoDataFrame]) -> None:
+        """Index the P-Code and name columns of every level.
+
+        Args:
+            gdfs: List of GeoDataFrames, with the item at index 0 corresponding to
+            admin level 0, index 1 to admin level 1, etc.
+        """
+        self.levels = [
+            DataFrame(
+                gdf[
+                    get_pcode_columns(gdf, ADMIN_LEVELS)
+                    + get_name_columns(gdf, ADMIN_LEVELS)
+                ],
+            )
+            for gdf in gdfs
+        ]
+
+    def get_unmatched(self, level: int, columns: list[str]) -> int:
+        """Counts rows of a level whose values match no row of its parent.
+
+        Args:
+            level: Admin level, above 0.
+            columns: Columns to match on, present in both levels.
+
+        Returns:
+            Number of unmatched rows.
+        """
+        keys = self.levels[level - 1][columns].drop_duplicates()
+        merged = self.levels[level][columns].merge(keys, how="left", indicator=True)
+        return (~merged["_merge"].eq("both")).sum()
+
+    def get_mismatched(self, level: int, index: np.ndarray, column: str) -> int:
+        """Counts pairs of a level and its parent with different values in a column.
+
+        Args:
+            level: Admin level, above 0.
+            index: Pairs of positions in the level and its parent.
+            column: Column to compare, present in both levels.
+
+        Returns:
+            Number of pairs with different values, missing values counting as empty.
+        """
+        left, right = index
+        child = self.levels[level][column].iloc[left].reset_index(drop=True)
+        parent = self.levels[level - 1][column].iloc[right].reset_index(drop=True)
+        return len(left) - child.fillna("").eq(parent.fillna("")).sum()
+
+    def get_not_nested(self, level: int) -> int:
+        """Counts P-Codes of a level which don't start with their parent P-Code.
+
+        Rows where either P-Code is missing or blank are not counted.
+
+        Args:
+            level: Admin level, above 0, with P-Codes of itself and its parent.
+
+        Returns:
+            Number of P-Codes not nested within their parent.
+        """
+        frame = self.levels[level]
+        pcodes = get_text(frame[f"adm{level}_pcode"])
+        parents = get_text(frame[f"adm{level - 1}_pcode"])
+        present = (pcodes != "") & (parents != "")
+        return (present & ~np.strings.startswith(pcodes, parents)).sum()
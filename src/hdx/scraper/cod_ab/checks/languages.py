@@ -1,10 +1,13 @@
-from geopandas import GeoDataFrame
 from langcodes import tag_is_valid
 
+from .context import LayerContext
 from hdx.scraper.cod_ab.config import LANGUAGE_COUNT
 
+# Each level is compared with the language count of the level above.
+DEPENDENCIES = [("languages", -1)]
 
-def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
+
+def check(iso3: str, context: LayerContext, admin_level: int) -> dict:
     """Checks for which languages are used within dataset.
 
     Datasets use the following pattern in their field names for identifying languages:
@@ -20,34 +23,33 @@ def main(iso3: str, gdfs: list[GeoDataFrame]) -> list[dict]:
 
     Args:
         iso3: ISO3 code of the current location being checked.
-        gdfs: List of GeoDataFrames, with the item at index 0 corresponding to admin
-        level 0, index 1 to admin level 1, etc.
+        context: Admin levels of the location, with their derived geometries.
+        admin_level: Admin level to check.
 
     Returns:
-        List of results to output as a CSV.
+        Check row to output as a CSV.
     """
-    check_results = []
+    gdf = context.gdfs[admin_level]
     language_parent = None
-    for admin_level, gdf in enumerate(gdfs):
-        row = {
-            "iso3": iso3,
-            "level": admin_level,
-            "language_count": 0,
-            "language_mix": 0,
-            "language_parent": language_parent,
-            "language_invalid": 0,
-        }
-        for index in range(LANGUAGE_COUNT):
-            lang_col = f"lang{index}" if index > 0 else "lang"
-            lang_codes = gdf[~gdf[lang_col].isna()][lang_col].drop_duplicates()
-            if len(lang_codes) > 1:
-                row["language_mix"] += 1
-            for lang_code in lang_codes:
-                if tag_is_valid(lang_code):
-                    row["language_count"] += 1
-                else:
-                    row["language_invalid"] += 1
-                row[f"language_{index}"] = lang_code
-        language_parent = row["language_count"]
-        check_results.append(row)
-    return check_results
+    if admin_level > 0:
+        language_parent = context.row("languages", admin_level - 1)["language_count"]
+    row = {
+        "iso3": iso3,
+        "level": admin_level,
+        "language_count": 0,
+        "language_mix": 0,
+        "language_parent": language_parent,
+        "language_invalid": 0,
+    }
+    for index in range(LANGUAGE_COUNT):
+        lang_col = f"lang{index}" if index > 0 else "lang"
+        lang_codes = gdf[~gdf[lang_col].isna()][lang_col].drop_duplicates()
+        if len(lang_codes) > 1:
+            row["language_mix"] += 1
+        for lang_code in lang_codes:
+            if tag_is_valid(lang_code):
+                row["language_count"] += 1
+            else:
+                row["language_invalid"] += 1
+            row[f"language_{index}"] = lang_code
+    return row
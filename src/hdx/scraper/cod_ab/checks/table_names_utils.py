@@ -1,6 +1,12 @@
+import re
+import sys
+from dataclasses import dataclass
+from functools import cache
+
 from geopandas import GeoDataFrame
 from icu import USET_ADD_CASE_MAPPINGS, LocaleData, ULocaleDataExemplarSetType
 from langcodes import tag_is_valid
+from pandas import Series
 
 from .table_names_config import auxiliary_codes, exclude_check, punctuation_set
 from hdx.scraper.cod_ab.config import LANGUAGE_COUNT, m49, official_languages
@@ -28,84 +34,122 @@ def get_char_set(lang: str, iso3: str) -> list[str]:
     ] + [chr(int(x[2:], 16)) for x in auxiliary_codes.get(f"{lang}-{iso3}", [])]
 
 
-def get_invalid_chars(lang: str, name: str | None, iso3: str) -> str:
-    """Check if a value within a column is a valid name based on it's language code."""
-    if (
-        not isinstance(name, str)
-        or not name.strip()
-        or not tag_is_valid(lang)
-        or lang in exclude_check
-    ):
-        return ""
-    char_set = get_char_set(lang, iso3)
-    return "".join({char for char in name if char not in char_set + punctuation_set})
+def get_class(chars: set[str], *, negate: bool = False) -> re.Pattern:
+    """Compiles a regex character class matching any of a set of characters.
+
+    Only entries of a single character are used, as a name is checked one character
+    at a time. Inside a class, an entry such as "ch" would make "c" and "h" valid on
+    their own.
+
+    Args:
+        chars: Characters of the class.
+        negate: Whether to match any character not in the set instead.
+
+    Returns:
+        Compiled pattern matching a single character.
+    """
+    chars = {x for x in chars if len(x) == 1}
+    if not chars:
+        return re.compile("(?s:.)" if negate else "(?!)")
+    escaped = "".join(re.escape(x) for x in sorted(chars))
+    return re.compile(f"[^{escaped}]" if negate else f"[{escaped}]")
+
+
+@cache
+def get_digits() -> re.Pattern:
+    """Compiles a character class of every character for which isdigit is true."""
+    return get_class({chr(x) for x in range(sys.maxunicode + 1) if chr(x).isdigit()})
+
+
+@dataclass(frozen=True)
+class Validator:
+    """Characters allowed in the names of a language, compiled for a location.
+
+    Attributes:
+        checked: Whether names in the language are checked at all.
+        chars: Matches a character of the language.
+        invalid: Matches a character neither of the language nor punctuation.
+    """
+
+    checked: bool
+    chars: re.Pattern
+    invalid: re.Pattern
+
+
+@cache
+def get_validator(lang: str, iso3: str) -> Validator:
+    """Gets the validator of a language for a location, building it only once."""
+    if not tag_is_valid(lang) or lang in exclude_check:
+        never = get_class(set())
+        return Validator(checked=False, chars=never, invalid=never)
+    char_set = set(get_char_set(lang, iso3))
+    return Validator(
+        checked=True,
+        chars=get_class(char_set),
+        invalid=get_class(char_set | set(punctuation_set), negate=True),
+    )
+
 
+def get_text(names: Series) -> Series:
+    """Gets the names in a column which are non-blank strings."""
+    return names[[isinstance(x, str) and bool(x.strip()) for x in names]].astype(str)
 
-def is_invalid_adm0(lang: str, name: str | None, iso3: str) -> bool:
-    """Checks if Admin 0 name is invalid."""
+
+def get_invalid_chars(lang: str, text: Series, iso3: str) -> set[str]:
+    """Gets the characters of names which aren't valid for their language code."""
+    validator = get_validator(lang, iso3)
+    if not validator.checked:
+        return set()
+    return set(text.str.findall(validator.invalid).explode().dropna())
+
+
+def is_invalid_adm0(lang: str, names: Series, iso3: str) -> bool:
+    """Checks if any Admin 0 name is invalid."""
     if lang not in official_languages:
         return False
     if iso3 in m49:
-        return name != m49[iso3][f"{lang}_short"]
+        return names.ne(m49[iso3][f"{lang}_short"]).any()
     return False
 
 
-def is_upper(name: str | None) -> bool:
-    """Checks if name is all uppercase."""
-    if not isinstance(name, str) or not name.strip():
-        return False
-    return name == name.upper() and name.lower() != name.upper()
+def is_upper(text: Series) -> Series:
+    """Checks which names are all uppercase."""
+    upper = text.str.upper()
+    return text.eq(upper) & text.str.lower().ne(upper)
 
 
-def is_lower(name: str | None) -> bool:
-    """Checks if name is all lowercase."""
-    if not isinstance(name, str) or not name.strip():
-        return False
-    return name == name.lower() and name.lower() != name.upper()
+def is_lower(text: Series) -> Series:
+    """Checks which names are all lowercase."""
+    lower = text.str.lower()
+    return text.eq(lower) & lower.ne(text.str.upper())
 
 
-def has_numbers(name: str | None) -> bool:
-    """Checks if name has numbers."""
-    if not isinstance(name, str) or not name.strip():
-        return False
-    return any(char.isdigit() for char in name)
+def has_numbers(text: Series) -> Series:
+    """Checks which names have numbers."""
+    return text.str.contains(get_digits())
 
 
-def is_punctuation(lang: str, name: str | None, iso3: str) -> bool:
-    """Check if a value within a column is a valid name based on it's language code."""
-    if (
-        not isinstance(name, str)
-        or not name.strip()
-        or not tag_is_valid(lang)
-        or lang in exclude_check
-    ):
-        return False
-    char_set = get_char_set(lang, iso3)
-    return all(char not in char_set for char in name)
-
-
-def is_invalid(lang: str, name: str | None, iso3: str) -> bool:
-    """Check if a value within a column is a valid name based on it's language code."""
-    if (
-        not isinstance(name, str)
-        or not name.strip()
-        or not tag_is_valid(lang)
-        or lang in exclude_check
-    ):
-        return False
-    char_set = get_char_set(lang, iso3)
-    return any(char not in char_set + punctuation_set for char in name)
+def is_punctuation(lang: str, text: Series, iso3: str) -> Series:
+    """Checks which names have no characters valid for their language code."""
+    validator = get_validator(lang, iso3)
+    if not validator.checked:
+        return Series(False, index=text.index)
+    return ~text.str.contains(validator.chars)
 
 
-def has_double_spaces(name: str | None) -> bool:
-    """Checks if string has double spaces."""
-    if not isinstance(name, str) or not name.strip():
-        return False
-    return "  " in name
+def is_invalid(lang: str, text: Series, iso3: str) -> Series:
+    """Checks which names have characters not valid for their language code."""
+    validator = get_validator(lang, iso3)
+    if not validator.checked:
+        return Series(False, index=text.index)
+    return text.str.contains(validator.invalid)
 
 
-def has_strippable_spaces(name: str | None) -> bool:
-    """Checks if string has strippable spaces."""
-    if not isinstance(name, str) or not name.strip():
-        return False
-    return name != name.strip()
+def has_double_spaces(text: Series) -> Series:
+    """Checks which names have double spaces."""
+    return text.str.contains("  ", regex=False)
+
+
+def has_strippable_spaces(text: Series) -> Series:
+    """Checks which names have strippable spaces."""
+    return text.ne(text.str.strip())
@@ -28,7 +28,27 @@ ATTEMPT = int(getenv("ATTEMPT", "5"))
 WAIT = int(getenv("WAIT", "10"))
 TIMEOUT = int(getenv("TIMEOUT", "60"))
 TIMEOUT_DOWNLOAD = int(getenv("TIMEOUT_DOWNLOAD", "600"))
+KEEPALIVE = int(getenv("KEEPALIVE", "60"))
+HDX_ROWS = int(getenv("HDX_ROWS", "500"))
+TOKEN_EXPIRATION = int(getenv("TOKEN_EXPIRATION", "60"))
+TOKEN_REFRESH_MARGIN = int(getenv("TOKEN_REFRESH_MARGIN", "300"))
 ADMIN_LEVELS = int(getenv("ADMIN_LEVELS", "5"))
+WORKERS = int(getenv("WORKERS", "1"))
+CONCURRENCY = int(getenv("CONCURRENCY", "20"))
+DOWNLOAD_WORKERS = int(getenv("DOWNLOAD_WORKERS", "4"))
+PAGE_SIZE_STEP_UP = int(getenv("PAGE_SIZE_STEP_UP", "5"))
+POINTS_WORKERS = int(getenv("POINTS_WORKERS", "4"))
+STORE_MEMORY_MB = int(getenv("STORE_MEMORY_MB", "0"))
+FORMAT_WORKERS = int(getenv("FORMAT_WORKERS", "4"))
+ZIP_WORKERS = int(getenv("ZIP_WORKERS", "4"))
+CHECK_WORKERS = int(getenv("CHECK_WORKERS", "4"))
+CACHE_SIZE_MB = int(getenv("CACHE_SIZE_MB", "2000"))
+WITHIN_PARENT_PCODES = getenv("WITHIN_PARENT_PCODES", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+    "on",
+)
 
 LANGUAGE_COUNT = 4
 EPSG_EQUAL_AREA = 6933
@@ -37,6 +57,9 @@ GEOJSON_PRECISION = 6
 METERS_PER_KM = 1_000_000
 PLOTLY_SIMPLIFY = 0.000_01
 POLYGON = "Polygon"
+POLYGON_TYPE_IDS = [3, 6]
+POLYLABEL_TOLERANCE = 0.000_001
+POLYLABEL_TOLERANCE_RELATIVE = 0.000_01
 SLIVER_GAP_AREA_KM = 0.000_1
 SLIVER_GAP_THINNESS = 0.001
 VALID_GEOMETRY = "Valid Geometry"
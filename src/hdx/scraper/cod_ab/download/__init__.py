@@ -1,42 +1,41 @@
-from . import metadata, ogr2ogr, points, postprocess
-from hdx.scraper.cod_ab.config import data_dir, services_url
+from . import featureserver, metadata, points
+from .verify import LINE, POINT, POLYGON
+from hdx.scraper.cod_ab.config import data_dir
+from hdx.scraper.cod_ab.store import LayerStore
 
 
-def download_polygons(iso3: str) -> None:
+def download_polygons(iso3: str, store: LayerStore) -> None:
     """Download polygons from ArcGIS server."""
     points_path = data_dir / iso3.lower() / f"{iso3.lower()}_adminpoints.parquet"
     points_path.unlink(missing_ok=True)
-    indexes = metadata.polygons(iso3)
-    for lvl, index in enumerate(indexes):
-        url = f"{services_url}/cod_{iso3.lower()}_ab_standardized/FeatureServer/{index}"
+    catalog = metadata.get_catalog(iso3)
+    for lvl, layer in enumerate(catalog.polygons()):
+        url = catalog.layer_url(layer)
         file_path = data_dir / iso3.lower() / f"{iso3.lower()}_admin{lvl}"
-        ogr2ogr.main(file_path, url, 3)
-        postprocess.to_parquet(file_path)
-        points.to_points(file_path)
+        store.put(file_path.stem, featureserver.main(file_path, url, layer, POLYGON))
+        points.to_points(file_path, store.gdf(file_path.stem))
 
 
-def download_lines(iso3: str) -> None:
+def download_lines(iso3: str, store: LayerStore) -> None:
     """Download lines from ArcGIS server."""
-    indexes = metadata.lines(iso3)
-    for index in indexes:
-        url = f"{services_url}/cod_{iso3.lower()}_ab_standardized/FeatureServer/{index}"
+    catalog = metadata.get_catalog(iso3)
+    for layer in catalog.lines():
+        url = catalog.layer_url(layer)
         file_path = data_dir / iso3.lower() / f"{iso3.lower()}_adminlines"
-        ogr2ogr.main(file_path, url, 2)
-        postprocess.to_parquet(file_path)
+        store.put(file_path.stem, featureserver.main(file_path, url, layer, LINE))
 
 
-def download_points(iso3: str) -> None:
+def download_points(iso3: str, store: LayerStore) -> None:
     """Download points from ArcGIS server."""
-    indexes = metadata.points(iso3)
-    for index in indexes:
-        url = f"{services_url}/cod_{iso3.lower()}_ab_standardized/FeatureServer/{index}"
+    catalog = metadata.get_catalog(iso3)
+    for layer in catalog.points():
+        url = catalog.layer_url(layer)
         file_path = data_dir / iso3.lower() / f"{iso3.lower()}_adminpoints"
-        ogr2ogr.main(file_path, url, 1)
-        postprocess.to_parquet(file_path)
+        store.put(file_path.stem, featureserver.main(file_path, url, layer, POINT))
 
 
-def main(iso3: str) -> None:
+def main(iso3: str, store: LayerStore) -> None:
     """Entrypoint for the module."""
-    download_polygons(iso3)
-    download_lines(iso3)
-    download_points(iso3)
+    download_polygons(iso3, store)
+    download_lines(iso3, store)
+    download_points(iso3, store)
@@ -0,0 +1,371 @@
+import json
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from logging import getLogger
+from pathlib import Path
+
+import pyarrow as pa
+from httpx import HTTPError
+from pyogrio import read_arrow
+from tenacity import (
+    RetryError,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_fixed,
+)
+
+from . import postprocess
+from .metadata import Layer
+from .page_sizes import PageSizes
+from .spool import Spool, get_runs
+from .verify import Verification
+from .verify import main as verify
+from hdx.scraper.cod_ab.config import ATTEMPT, DOWNLOAD_WORKERS, WAIT
+from hdx.scraper.cod_ab.utils import (
+    client_get,
+    get_token,
+    timeout_download,
+    timeout_metadata,
+)
+
+logger = getLogger(__name__)
+
+
+class ServerError(RuntimeError):
+    """ArcGIS Server returned an error, or fewer features than were requested."""
+
+
+# Errors from which a smaller page size may recover. RetryError is raised by
+# client_get once its own retries of a failed request are exhausted.
+SERVER_ERRORS = (HTTPError, RetryError, ServerError)
+
+
+def get_object_ids(url: str) -> list[int]:
+    """Get the sorted object IDs of every feature in a layer.
+
+    Args:
+        url: Base URL of an ArcGIS Feature Service layer.
+
+    Returns:
+        Sorted list of object IDs.
+    """
+    params = {
+        "f": "json",
+        "where": "1=1",
+        "returnIdsOnly": "true",
+        "token": get_token(),
+    }
+    r = client_get(f"{url}/query", timeout_metadata, params).json()
+    return sorted(r.get("objectIds") or [])
+
+
+def get_count(url: str) -> int:
+    """Get the number of features in a layer as reported by the server.
+
+    Args:
+        url: Base URL of an ArcGIS Feature Service layer.
+
+    Returns:
+        Number of features.
+    """
+    params = {
+        "f": "json",
+        "where": "1=1",
+        "returnCountOnly": "true",
+        "token": get_token(),
+    }
+    return client_get(f"{url}/query", timeout_metadata, params).json()["count"]
+
+
+def get_records(layer: Layer, records: int | None) -> int:
+    """Get the page size to use, never more than the layer's "maxRecordCount"."""
+    max_records = layer.max_record_count or records or 1000
+    return min(records or max_records, max_records)
+
+
+def get_pages(runs: list[list[int]], records: int) -> list[list[int]]:
+    """Splits runs of object IDs into pages of at most the number of records given."""
+    return [
+        run[index : index + records]
+        for run in runs
+        for index in range(0, len(run), records)
+    ]
+
+
+def get_error(content: bytes) -> dict | None:
+    """Get the error returned by ArcGIS Server in place of a page, if any.
+
+    ArcGIS Server reports errors with a 200 status and a JSON object with an "error"
+    key, which may be preceded by whitespace or follow other keys.
+    """
+    body = json.loads(content)
+    return body.get("error") if isinstance(body, dict) else None
+
+
+def get_page(url: str, layer: Layer, object_ids: list[int]) -> pa.Table:
+    """Downloads a single page of ESRI JSON and reads it as an Arrow table.
+
+    The page is requested as a range of object IDs rather than with "resultOffset",
+    so that pages are independent of each other and can be fetched in any order. As
+    the object IDs of the layer are known, the page is expected to contain exactly one
+    feature for each of them.
+
+    Args:
+        url: Base URL of an ArcGIS Feature Service layer.
+        layer: Properties of the layer.
+        object_ids: Sorted object IDs making up the page, empty for the whole layer.
+
+    Returns:
+        Page as an Arrow table.
+    """
+    where = "1=1"
+    if object_ids:
+        field = layer.object_id_field
+        where = f"{field} >= {object_ids[0]} AND {field} <= {object_ids[-1]}"
+    params = {
+        "f": "json",
+        "where": where,
+        "outFields": "*",
+        "orderByFields": layer.object_id_field,
+        "token": get_token(),
+    }
+    r = client_get(f"{url}/query", timeout_download, params)
+    r.raise_for_status()
+    error = get_error(r.content)
+    if error is not None:
+        raise ServerError(f"{url}: {error}")
+    meta, table = read_arrow(BytesIO(r.content))
+    geometry_name = meta["geometry_name"] or "wkb_geometry"
+    table = table.rename_columns({geometry_name: "geometry"})
+    if object_ids and table.num_rows != len(object_ids):
+        raise ServerError(f"{url}: {table.num_rows} of {len(object_ids)} records")
+    return table
+
+
+def fetch_all(fetch: Callable[[list[int]], pa.Table | None], pages: list) -> list:
+    """Calls a function for every page concurrently, cancelling the rest on error."""
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = [executor.submit(fetch, x) for x in pages]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def download(
+    url: str,
+    layer: Layer,
+    object_ids: list[int],
+    records: int,
+    spool: Spool,
+) -> None:
+    """Downloads every page of a layer concurrently into the spool.
+
+    Each completed page is saved to the spool as soon as it arrives, and only object
+    IDs not already in the spool are requested.
+
+    Args:
+        url: Base URL of an ArcGIS Feature Service layer.
+        layer: Properties of the layer.
+        object_ids: Sorted object IDs of every feature in the layer.
+        records: The number of records to fetch from the server per request.
+        spool: Spool of pages already completed for the layer.
+    """
+    pages = get_pages(spool.missing(object_ids), records)
+
+    def fetch(page: list[int]) -> None:
+        spool.save(page, get_page(url, layer, page))
+
+    fetch_all(fetch, pages)
+
+
+def refetch(
+    url: str,
+    layer: Layer,
+    object_ids: list[int],
+    records: int,
+    table: pa.Table,
+    result: Verification,
+) -> pa.Table:
+    """Replaces features which failed verification with a fresh copy from the server.
+
+    Rows which are duplicated, unexpected or have an empty geometry are dropped, and
+    only the object IDs which are missing or empty are requested again.
+
+    Args:
+        url: Base URL of an ArcGIS Feature Service layer.
+        layer: Properties of the layer.
+        object_ids: Sorted object IDs of every feature in the layer.
+        records: The number of records to fetch from the server per request.
+        table: Downloaded layer as an Arrow table.
+        result: Verification of the downloaded layer.
+
+    Returns:
+        Layer as an Arrow table, sorted by object ID.
+    """
+    ids = set(result.refetch)
+    runs = get_runs(object_ids, [x in ids for x in object_ids])
+    pages = fetch_all(lambda x: get_page(url, layer, x), get_pages(runs, records))
+    table = pa.concat_tables(
+        [table.filter(result.keep), *pages],
+        promote_options="default",
+    )
+    return table.sort_by(layer.object_id_field)
+
+
+def verify_page(
+    file_path: Path,
+    url: str,
+    layer: Layer,
+    object_ids: list[int],
+    records: int,
+    table: pa.Table,
+    geom_type: int,
+) -> tuple[pa.Table, Verification]:
+    """Verifies a downloaded page, refetching the features which failed.
+
+    Args:
+        file_path: name to use for saved layer.
+        url: Base URL of an ArcGIS Feature Service layer.
+        layer: Properties of the layer.
+        object_ids: Sorted object IDs on the server within the range of the page.
+        records: The number of records to fetch from the server per request.
+        table: Downloaded page as an Arrow table.
+        geom_type: geometry type as integer.
+
+    Returns:
+        The page as downloaded if it passed, otherwise the refetched page, with its
+        verification.
+    """
+    result = verify(table, layer.object_id_field, object_ids, geom_type)
+    if result.refetch or not result.is_complete:
+        logger.warning(
+            "Refetching %s features: %s", len(result.refetch), file_path.stem
+        )
+        table = refetch(url, layer, object_ids, records, table, result)
+        result = verify(table, layer.object_id_field, object_ids, geom_type)
+    if result.empty:
+        logger.warning("Empty geometries in %s: %s", file_path.stem, result.empty)
+    return table, result
+
+
+@retry(
+    stop=stop_after_attempt(ATTEMPT),
+    wait=wait_fixed(WAIT),
+    retry=retry_if_exception_type((*SERVER_ERRORS, RuntimeError)),
+)
+def download_layer(
+    file_path: Path,
+    url: str,
+    layer: Layer,
+    geom_type: int,
+    spool: Spool,
+) -> pa.Table:
+    """Downloads ESRI JSON from an ArcGIS Feature Server and saves as GeoParquet.
+
+    First, attempts to download ESRI JSON paginating through the layer with the value
+    set by "maxRecordCount". This request may fail due to memory issues on the server.
+
+    Then, starting with "1000" and reducing by factors of "10", try to paginate through
+    the layer. "1000" is a value that will succeed for most layers, however layers with
+    excessively large geometries will require smaller sets of records to avoid
+    overloading the server's memory. Pages are fetched concurrently, and when all
+    records have been obtained, they are verified and saved.
+
+    The page size which succeeded is remembered for the layer, and the next download
+    starts from that size rather than from the top of the ladder. Pages completed with
+    a larger size are kept in the spool, so stepping down the ladder only fetches the
+    remaining object IDs.
+
+    Each page in the spool is then verified against the object IDs reported by the
+    server within its range. Features which are missing or have an empty geometry are
+    fetched again by object ID, and the corrected page replaces the saved one. Any
+    remaining mismatch, including duplicated object IDs or geometries of the wrong
+    type, clears the spool and fails the download. Verified pages are streamed from
+    the spool to GeoParquet, so the downloaded layer is never in memory as a whole.
+
+    Only HTTP errors and errors returned by the server step down the ladder, anything
+    else is raised straight away. If at the end of this loop, the function is unable to
+    download a layer, it is likely that a network error has occured. The RuntimeError,
+    raised from the last error, will trigger tenacity to retry the function again,
+    resuming from the pages in the spool.
+
+    Args:
+        file_path: name to use for saved layer.
+        url: Base URL of an ArcGIS Feature Service layer.
+        layer: Properties of the layer.
+        geom_type: geometry type as integer.
+        spool: Spool of pages already completed for the layer.
+
+    Returns:
+        Normalized layer as an Arrow table.
+
+    Raises:
+        RuntimeError: Raises an error with the filename of a layer unable to be
+        downloaded.
+    """
+    object_ids = get_object_ids(url)
+    count = get_count(url)
+    if len(object_ids) != count:
+        raise RuntimeError(f"{file_path}: {len(object_ids)} of {count} object IDs")
+    if not object_ids:
+        table = get_page(url, layer, [])
+        table, result = verify_page(file_path, url, layer, [], 0, table, geom_type)
+        if not result.is_complete:
+            raise RuntimeError(f"{file_path}: {result}")
+        return postprocess.to_parquet(lambda: [table], file_path)
+    page_sizes = PageSizes(url.split("/")[-3])
+    error = None
+    for size in page_sizes.ladder(layer.name):
+        records = get_records(layer, size)
+        try:
+            download(url, layer, object_ids, records, spool)
+            page_sizes.record(layer.name, size)
+            break
+        except SERVER_ERRORS as err:
+            error = err
+            logger.warning(
+                "Retrying with fewer records: %s",
+                file_path.stem,
+                exc_info=True,
+            )
+    else:
+        raise RuntimeError(file_path) from error
+    for first, last, page_ids in spool.pages(object_ids):
+        table = spool.read(first, last)
+        verified, result = verify_page(
+            file_path, url, layer, page_ids, records, table, geom_type
+        )
+        if not result.is_complete:
+            spool.clear()
+            raise RuntimeError(f"{file_path}: {result}")
+        if verified is not table:
+            spool.save([first, last], verified)
+    return postprocess.to_parquet(spool.load, file_path)
+
+
+def main(file_path: Path, url: str, layer: Layer, geom_type: int) -> pa.Table:
+    """Downloads a layer, checkpointing completed pages until it is saved.
+
+    Pages are only reused across runs when the layer has a "lastEditDate", otherwise
+    there is no way to tell whether the pages are still current.
+
+    Args:
+        file_path: name to use for saved layer.
+        url: Base URL of an ArcGIS Feature Service layer.
+        layer: Properties of the layer.
+        geom_type: geometry type as integer.
+
+    Returns:
+        Normalized layer as an Arrow table.
+    """
+    spool = Spool(url.split("/")[-3], layer)
+    if layer.last_edit_date is None:
+        spool.clear()
+    table = download_layer(file_path, url, layer, geom_type, spool)
+    spool.clear()
+    return table
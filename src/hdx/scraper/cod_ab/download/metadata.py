@@ -1,41 +1,84 @@
 import re
+from dataclasses import dataclass
+from functools import cache
 
 from hdx.scraper.cod_ab.config import services_url
-from hdx.scraper.cod_ab.utils import client_get, generate_token
+from hdx.scraper.cod_ab.utils import client_get, get_token
 
 p1 = re.compile(r"[a-z]{3}_admin\d$")
 p2 = re.compile(r"[a-z]{3}_adminlines$")
 p3 = re.compile(r"[a-z]{3}_admincentroids$")
 
 
-def polygons(iso3: str) -> list[int]:
-    """Get the layer index from the ArcGIS server."""
-    params = {"f": "json", "token": generate_token()}
-    service_name = f"cod_{iso3.lower()}_ab_standardized"
-    layers_url = f"{services_url}/{service_name}/FeatureServer"
-    layers = client_get(layers_url, params=params).json()["layers"]
-    return [
-        x["id"] for x in sorted(layers, key=lambda x: x["name"]) if p1.search(x["name"])
-    ]
+@dataclass(frozen=True)
+class Layer:
+    """Properties of a single FeatureServer layer."""
 
+    id: int
+    name: str
+    geometry_type: str
+    object_id_field: str
+    max_record_count: int | None
+    last_edit_date: int | None
+    query_formats: tuple[str, ...]
+
+    @classmethod
+    def from_json(cls, layer: dict) -> "Layer":
+        """Create a layer from its entry in the FeatureServer "layers" resource."""
+        query_formats = layer.get("supportedQueryFormats") or ""
+        return cls(
+            id=layer["id"],
+            name=layer["name"],
+            geometry_type=layer.get("geometryType") or "",
+            object_id_field=layer.get("objectIdField") or "objectid",
+            max_record_count=layer.get("maxRecordCount"),
+            last_edit_date=(layer.get("editingInfo") or {}).get("lastEditDate"),
+            query_formats=tuple(x.strip() for x in query_formats.split(",") if x),
+        )
+
+
+@dataclass(frozen=True)
+class LayerCatalog:
+    """All layers of an ISO3's FeatureServer, sorted by name."""
+
+    url: str
+    layers: tuple[Layer, ...]
+
+    def filter(self, pattern: re.Pattern) -> list[Layer]:
+        """Get layers with a name matching the pattern."""
+        return [x for x in self.layers if pattern.search(x.name)]
+
+    def polygons(self) -> list[Layer]:
+        """Get admin boundary polygon layers, ordered by admin level."""
+        return self.filter(p1)
+
+    def lines(self) -> list[Layer]:
+        """Get admin boundary line layers."""
+        return self.filter(p2)
+
+    def points(self) -> list[Layer]:
+        """Get admin boundary point layers."""
+        return self.filter(p3)
+
+    def layer_url(self, layer: Layer) -> str:
+        """Get the URL of a layer."""
+        return f"{self.url}/{layer.id}"
 
-def lines(iso3: str) -> list[int]:
-    """Get the layer index from the ArcGIS server."""
-    params = {"f": "json", "token": generate_token()}
-    service_name = f"cod_{iso3.lower()}_ab_standardized"
-    layers_url = f"{services_url}/{service_name}/FeatureServer"
-    layers = client_get(layers_url, params=params).json()["layers"]
-    return [
-        x["id"] for x in sorted(layers, key=lambda x: x["name"]) if p2.search(x["name"])
-    ]
 
+@cache
+def get_catalog(iso3: str) -> LayerCatalog:
+    """Get the layer catalog of an ISO3's FeatureServer.
 
-def points(iso3: str) -> list[int]:
-    """Get the layer index from the ArcGIS server."""
-    params = {"f": "json", "token": generate_token()}
+    The "layers" resource returns the full definition of every layer in a single
+    request, so it is fetched once per ISO3 and shared by all download stages.
+    """
+    params = {"f": "json", "token": get_token()}
     service_name = f"cod_{iso3.lower()}_ab_standardized"
     layers_url = f"{services_url}/{service_name}/FeatureServer"
-    layers = client_get(layers_url, params=params).json()["layers"]
-    return [
-        x["id"] for x in sorted(layers, key=lambda x: x["name"]) if p3.search(x["name"])
-    ]
+    layers = client_get(f"{layers_url}/layers", params=params).json()["layers"]
+    return LayerCatalog(
+        url=layers_url,
+        layers=tuple(
+            Layer.from_json(x) for x in sorted(layers, key=lambda x: x["name"])
+        ),
+    )
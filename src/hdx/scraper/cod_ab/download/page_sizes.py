@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+from hdx.scraper.cod_ab.config import PAGE_SIZE_STEP_UP, data_dir
+
+page_sizes_dir = data_dir / "page_sizes"
+
+# Number of records per page, from the layer's "maxRecordCount" down to a single one.
+LADDER: list[int | None] = [None, 1000, 100, 10, 1]
+
+
+class PageSizes:
+    """Remembers the largest page size that worked for each layer of a service.
+
+    Sizes are persisted as a small JSON file per service, so that layers with heavy
+    geometries start the fallback ladder from the size that last succeeded instead of
+    failing on larger pages every run. After a number of consecutive successes, the
+    next larger size is tried again in case the server is able to handle it.
+    """
+
+    def __init__(self, service: str) -> None:
+        """Load the stored page sizes of a service.
+
+        Args:
+            service: Name of the ArcGIS Feature Service.
+        """
+        self.path: Path = page_sizes_dir / f"{service}.json"
+        self.sizes: dict[str, dict] = {}
+        if self.path.exists():
+            self.sizes = json.loads(self.path.read_text())
+
+    def ladder(self, layer: str) -> list[int | None]:
+        """Get the page sizes to try for a layer, starting with the remembered one."""
+        start = self.sizes.get(layer, {}).get("records")
+        return LADDER[LADDER.index(start) :] if start in LADDER else LADDER
+
+    def record(self, layer: str, records: int | None) -> None:
+        """Record the page size which succeeded for a layer and persist it.
+
+        Args:
+            layer: Name of the layer.
+            records: Page size which succeeded.
+        """
+        size = self.sizes.get(layer, {"records": records, "successes": 0})
+        if size["records"] == records:
+            size["successes"] += 1
+        else:
+            size = {"records": records, "successes": 1}
+        index = LADDER.index(records)
+        if size["successes"] >= PAGE_SIZE_STEP_UP and index > 0:
+            size = {"records": LADDER[index - 1], "successes": 0}
+        self.sizes[layer] = size
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self.path.write_text(json.dumps(self.sizes, indent=2, sort_keys=True))
@@ -1,26 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from geopandas import read_parquet
-from shapely import make_valid
-from shapely.ops import polylabel
+import numpy as np
+from geopandas import GeoDataFrame, GeoSeries
+from shapely import (
+    area,
+    bounds,
+    get_parts,
+    get_point,
+    make_valid,
+    maximum_inscribed_circle,
+)
 
+from hdx.scraper.cod_ab.config import (
+    POINTS_WORKERS,
+    POLYLABEL_TOLERANCE,
+    POLYLABEL_TOLERANCE_RELATIVE,
+)
 
-def to_points(file_path: Path) -> None:
-    """Uses OGR2OGR to turn a GeoPackage into GeoParquet.
+
+def get_largest_parts(geometry: np.ndarray) -> np.ndarray:
+    """Gets the largest part of each geometry, keeping the first one of equal area.
+
+    Args:
+        geometry: Array of polygons and multipolygons.
+
+    Returns:
+        Array of polygons, None where a geometry has no parts.
+    """
+    parts, index = get_parts(geometry, return_index=True)
+    order = np.lexsort((-area(parts), index))
+    _, first = np.unique(index[order], return_index=True)
+    largest = np.full(len(geometry), None, dtype=object)
+    largest[index[order][first]] = parts[order][first]
+    return largest
+
+
+def get_tolerance(geometry: np.ndarray) -> np.ndarray:
+    """Gets a polylabel tolerance for each geometry, scaled to its size.
+
+    The tolerance is a fraction of the longest side of the bounding box, so that large
+    polygons are not searched to the same absolute precision as small ones. It is never
+    finer than the absolute tolerance, which small polygons keep.
+    """
+    xmin, ymin, xmax, ymax = bounds(geometry).T
+    size = np.nan_to_num(np.fmax(xmax - xmin, ymax - ymin))
+    return np.fmax(size * POLYLABEL_TOLERANCE_RELATIVE, POLYLABEL_TOLERANCE)
+
+
+def get_polylabels(geometry: np.ndarray, tolerance: np.ndarray) -> np.ndarray:
+    """Gets the pole of inaccessibility of each geometry.
+
+    GEOS releases the GIL, so chunks of geometries are computed on a thread pool.
+
+    Args:
+        geometry: Array of polygons.
+        tolerance: Tolerance of each polygon.
+
+    Returns:
+        Array of points.
+    """
+    chunks = max(1, min(len(geometry), POINTS_WORKERS * 4))
+    with ThreadPoolExecutor(max_workers=POINTS_WORKERS) as executor:
+        results = executor.map(
+            lambda x, y: get_point(maximum_inscribed_circle(x, y), 0),
+            np.array_split(geometry, chunks),
+            np.array_split(tolerance, chunks),
+        )
+        return np.concatenate(list(results))
+
+
+def to_points(file_path: Path, gdf: GeoDataFrame) -> None:
+    """Turns admin boundary polygons into representative points saved as GeoParquet.
+
+    The largest part of each multipolygon is used, and its pole of inaccessibility is
+    found with a tolerance scaled to the size of the part.
 
     Args:
         file_path: Name of the downloaded layer.
+        gdf: Downloaded layer.
     """
-    src_dataset = file_path.with_suffix(".parquet")
-    dst_dataset = src_dataset.with_stem(file_path.stem + "points")
-    gdf = read_parquet(src_dataset)
-    gdf.geometry = gdf.geometry.apply(
-        lambda x: max(x.geoms, key=lambda a: a.area)
-        if x.geom_type == "MultiPolygon"
-        else x,
-    )
-    gdf.geometry = gdf.geometry.apply(
-        lambda x: polylabel(make_valid(x), tolerance=1e-6),
+    dst_dataset = file_path.with_stem(file_path.stem + "points").with_suffix(".parquet")
+    polygons = make_valid(get_largest_parts(gdf.geometry.to_numpy()))
+    gdf = gdf.set_geometry(
+        GeoSeries(
+            get_polylabels(polygons, get_tolerance(polygons)),
+            index=gdf.index,
+            crs=gdf.crs,
+        ),
     )
     gdf.to_parquet(
         dst_dataset,
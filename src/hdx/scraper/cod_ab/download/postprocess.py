@@ -1,53 +1,240 @@
+import json
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from pathlib import Path
 
-from geopandas import GeoDataFrame, read_file
-from pandas import to_datetime
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from pycountry import countries
+from pyproj import CRS
+from shapely import bounds, from_wkb, get_type_id
 
+# Columns of a downloaded layer which are not kept.
+drop_columns = {
+    "OBJECTID",
+    "objectid",
+    "SHAPE__Area",
+    "Shape__Area",
+    "SHAPE__Length",
+    "Shape__Length",
+}
 
-def add_iso_codes(gdf: GeoDataFrame, file_path: Path) -> GeoDataFrame:
-    """Adds ISO codes to a GeoDataFrame based on filename."""
+# Columns of a downloaded layer which are kept under a different name.
+rename_columns = {f"adm{lvl}_ref_name": f"adm{lvl}_ref" for lvl in range(6)}
+
+# Target type of columns by their downloaded type, other types are kept as they are.
+# Floating point columns are also cast to int64 when every value is whole, see
+# is_whole.
+cast_types = [
+    (pa.types.is_null, pa.string()),
+    (pa.types.is_timestamp, pa.date32()),
+]
+
+# Floating point values from this magnitude can't be cast to int64.
+int64_limit = 2.0**63
+
+# Columns added to every layer.
+iso_fields = [pa.field("iso3", pa.string()), pa.field("iso2", pa.string())]
+
+bbox_type = pa.struct([(x, pa.float64()) for x in ["xmin", "ymin", "xmax", "ymax"]])
+
+# GeoParquet names of shapely geometry type IDs.
+geometry_types = [
+    "Point",
+    "LineString",
+    "LineString",
+    "Polygon",
+    "MultiPoint",
+    "MultiLineString",
+    "MultiPolygon",
+    "GeometryCollection",
+]
+
+
+def is_whole(column: pa.ChunkedArray) -> bool:
+    """Checks if every non-null value of a floating point column is a whole number.
+
+    Matches the integer columns "convert_dtypes" used to make of whole doubles. A
+    column of only nulls counts as whole, while NaN and infinite values don't.
+    """
+    whole = pc.and_(
+        pc.equal(pc.floor(column), column),
+        pc.less(pc.abs(column), int64_limit),
+    )
+    return pc.all(whole, min_count=0).as_py()
+
+
+@dataclass
+class Scan:
+    """What a first pass over the pages of a downloaded layer found."""
+
+    schema: pa.Schema
+    whole: set[str]
+    bounds: list[np.ndarray]
+    types: set[int]
+    extents: list[list[float]]
+
+
+def scan(pages: Callable[[], Iterable[pa.Table]]) -> Scan:
+    """Reads the pages of a downloaded layer one at a time, before any is written.
+
+    Args:
+        pages: Function which loads the pages of a downloaded layer one at a time.
+
+    Returns:
+        Schema of the pages unified as "concat_tables" would, the floating point
+        columns in which every value is a whole number, and the bounds of each
+        geometry, geometry types and extent of each page.
+    """
+    schemas = []
+    not_whole = set()
+    page_bounds = []
+    types = set()
+    extents = []
+    for page in pages():
+        schemas.append(page.schema)
+        for field in page.schema:
+            if pa.types.is_floating(field.type) and not is_whole(page[field.name]):
+                not_whole.add(field.name)
+        geometry = from_wkb(page.column("geometry"))
+        types.update(np.unique(get_type_id(geometry)).tolist())
+        bbox = bounds(geometry)
+        page_bounds.append(bbox)
+        valid = bbox[~np.isnan(bbox).any(axis=1)]
+        if len(valid):
+            extents.append([*valid[:, :2].min(axis=0), *valid[:, 2:].max(axis=0)])
+    schema = pa.unify_schemas(schemas, promote_options="default")
+    floating = {x.name for x in schema if pa.types.is_floating(x.type)}
+    return Scan(schema, floating - not_whole, page_bounds, types, extents)
+
+
+def get_target_schema(
+    schema: pa.Schema,
+    whole: set[str],
+) -> list[tuple[str, pa.Field]]:
+    """Gets the target field of each column which is kept from a downloaded layer.
+
+    Args:
+        schema: Schema of the downloaded layer.
+        whole: Floating point columns in which every value is a whole number.
+
+    Returns:
+        List of tuples with the downloaded column name and its target field.
+    """
+    columns = []
+    for field in schema:
+        if field.name in drop_columns:
+            continue
+        target = field.with_name(rename_columns.get(field.name, field.name))
+        for is_type, target_type in cast_types:
+            if is_type(field.type):
+                target = target.with_type(target_type)
+        if field.name in whole:
+            target = target.with_type(pa.int64())
+        columns.append((field.name, target))
+    return columns
+
+
+def get_iso_codes(file_path: Path) -> list[str]:
+    """Gets the ISO3 and ISO2 codes of a layer based on filename."""
     iso3 = file_path.stem[0:3].upper()
-    gdf["iso3"] = iso3
-    gdf["iso2"] = countries.get(alpha_3=iso3).alpha_2
-    return gdf
+    return [iso3, countries.get(alpha_3=iso3).alpha_2]
+
+
+def normalize(
+    page: pa.Table,
+    columns: list[tuple[str, pa.Field]],
+    iso_codes: list[str],
+    schema: pa.Schema,
+) -> pa.Table:
+    """Normalizes a page of a downloaded layer to the target schema.
+
+    Args:
+        page: Page of the downloaded layer, with the schema shared by every page.
+        columns: Downloaded column names and their target fields.
+        iso_codes: ISO3 and ISO2 codes of the layer.
+        schema: Target schema, including the ISO codes.
+
+    Returns:
+        Page with the target schema.
+    """
+    arrays = [pc.cast(page.column(name), field.type) for name, field in columns]
+    arrays += [pa.chunked_array([pa.repeat(x, page.num_rows)]) for x in iso_codes]
+    return pa.Table.from_arrays(arrays, schema=schema)
 
 
-def to_parquet(file_path: Path) -> None:
-    """Uses OGR2OGR to turn a FlatGeobuf into GeoParquet.
+def get_geo_metadata(field: pa.Field, types: set[int], extents: list) -> dict:
+    """Gets the GeoParquet metadata of a layer with WKB geometries.
 
     Args:
+        field: Geometry field of the downloaded layer.
+        types: Shapely geometry type IDs of the layer.
+        extents: Bounds of each page with geometries.
+
+    Returns:
+        GeoParquet metadata.
+    """
+    extension = json.loads(
+        (field.metadata or {}).get(b"ARROW:extension:metadata", "{}")
+    )
+    crs = extension.get("crs")
+    column = {
+        "encoding": "WKB",
+        "geometry_types": sorted({geometry_types[x] for x in types if x >= 0}),
+        "crs": CRS.from_user_input(crs).to_json_dict() if crs else None,
+        "covering": {"bbox": {x: ["bbox", x] for x in bbox_type.names}},
+    }
+    if extents:
+        extent = np.array(extents)
+        column["bbox"] = [*extent[:, :2].min(axis=0), *extent[:, 2:].max(axis=0)]
+    return {
+        "version": "1.1.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": column},
+    }
+
+
+def to_parquet(pages: Callable[[], Iterable[pa.Table]], file_path: Path) -> pa.Table:
+    """Normalizes the pages of a downloaded layer and streams them to GeoParquet.
+
+    A first pass over the pages finds the schema they share, which floating point
+    columns only hold whole numbers, and the bounds of every geometry for the
+    GeoParquet metadata and "bbox" covering column. A second pass casts each page to
+    the target schema and writes it, so that only one downloaded page is in memory at
+    a time.
+
+    Args:
+        pages: Function which loads the pages of a downloaded layer one at a time, in
+        order of object ID.
         file_path: Name of the downloaded layer.
+
+    Returns:
+        Normalized layer as an Arrow table, without the "bbox" covering column.
     """
-    src_dataset = file_path.with_suffix(".fgb")
-    dst_dataset = file_path.with_suffix(".parquet")
-    dst_dataset.unlink(missing_ok=True)
-    gdf = read_file(src_dataset).convert_dtypes()
-    for column in gdf.select_dtypes(include="object").columns:
-        if gdf[column].isna().all():
-            gdf[column] = gdf[column].astype("string")
-        else:
-            gdf[column] = gdf[column].astype("int32")
-    for column in gdf.select_dtypes(include="datetime64").columns:
-        gdf[column] = to_datetime(gdf[column]).astype("date32[pyarrow]")
-    for column in [
-        "OBJECTID",
-        "objectid",
-        "SHAPE__Area",
-        "Shape__Area",
-        "SHAPE__Length",
-        "Shape__Length",
-    ]:
-        if column in gdf.columns:
-            gdf = gdf.drop(columns=column)
-    for column in [f"adm{lvl}_ref_name" for lvl in range(6)]:
-        if column in gdf.columns:
-            gdf = gdf.rename(columns={column: column[:-5]})
-    gdf = add_iso_codes(gdf, file_path)
-    gdf.to_parquet(
-        dst_dataset,
-        compression="zstd",
-        geometry_encoding="geoarrow",
-        write_covering_bbox=True,
+    source = scan(pages)
+    columns = get_target_schema(source.schema, source.whole)
+    iso_codes = get_iso_codes(file_path)
+    schema = pa.schema([field for _, field in columns] + iso_fields)
+    metadata = get_geo_metadata(
+        source.schema.field("geometry"),
+        source.types,
+        source.extents,
     )
-    src_dataset.unlink(missing_ok=True)
+    empty = source.schema.empty_table()
+    batches = []
+    with pq.ParquetWriter(
+        file_path.with_suffix(".parquet"),
+        schema.append(pa.field("bbox", bbox_type)).with_metadata(
+            {"geo": json.dumps(metadata)},
+        ),
+        compression="zstd",
+    ) as writer:
+        for page, bbox in zip(pages(), source.bounds, strict=True):
+            page = pa.concat_tables([empty, page], promote_options="default")
+            normalized = normalize(page, columns, iso_codes, schema)
+            covering = pa.StructArray.from_arrays(list(bbox.T), fields=list(bbox_type))
+            writer.write_table(normalized.append_column("bbox", covering))
+            batches.extend(normalized.to_batches())
+    return pa.Table.from_batches(batches, schema)
@@ -0,0 +1,127 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from pathlib import Path
+from shutil import rmtree
+
+import pyarrow as pa
+from pyarrow.feather import read_table, write_feather
+
+from .metadata import Layer
+from hdx.scraper.cod_ab.config import data_dir
+
+spool_dir = data_dir / "spool"
+
+
+def get_runs(object_ids: list[int], selected: list[bool]) -> list[list[int]]:
+    """Get runs of consecutive selected object IDs.
+
+    Args:
+        object_ids: Sorted object IDs of every feature in the layer.
+        selected: Whether each object ID is selected.
+
+    Returns:
+        List of runs, each of which can be requested as a single range.
+    """
+    runs = []
+    run = []
+    for object_id, is_selected in zip(object_ids, selected, strict=True):
+        if is_selected:
+            run.append(object_id)
+        else:
+            if run:
+                runs.append(run)
+            run = []
+    if run:
+        runs.append(run)
+    return runs
+
+
+class Spool:
+    """Completed pages of a layer download, checkpointed to local disk.
+
+    Each page is saved as an Arrow IPC file named after the range of object IDs it
+    covers. A retry, or a rerun after a crash, only needs to fetch the object IDs not
+    yet covered before assembling the layer. Spools are kept per "lastEditDate" of a
+    layer, so pages of an older version of the layer are never reused.
+    """
+
+    def __init__(self, service: str, layer: Layer) -> None:
+        """Open the spool of a layer, removing spools of older versions.
+
+        Args:
+            service: Name of the ArcGIS Feature Service.
+            layer: Properties of the layer.
+        """
+        root = spool_dir / service / layer.name
+        self.path: Path = root / str(layer.last_edit_date)
+        if root.exists():
+            for other in root.iterdir():
+                if other != self.path:
+                    rmtree(other, ignore_errors=True)
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """Get the ranges of object IDs which have been saved, sorted by first ID."""
+        if not self.path.exists():
+            return []
+        return sorted(
+            (int(first), int(last))
+            for first, last in (x.stem.split("-") for x in self.path.glob("*.arrow"))
+        )
+
+    def missing(self, object_ids: list[int]) -> list[list[int]]:
+        """Get runs of consecutive object IDs not covered by any saved page.
+
+        Args:
+            object_ids: Sorted object IDs of every feature in the layer.
+
+        Returns:
+            List of runs, each of which can be requested as a single range.
+        """
+        missing = [True] * len(object_ids)
+        for first, last in self.ranges():
+            start = bisect_left(object_ids, first)
+            end = bisect_right(object_ids, last)
+            missing[start:end] = [False] * (end - start)
+        return get_runs(object_ids, missing)
+
+    def pages(self, object_ids: list[int]) -> list[tuple[int, int, list[int]]]:
+        """Get the object IDs covered by each saved page, sorted by first ID.
+
+        Args:
+            object_ids: Sorted object IDs of every feature in the layer.
+
+        Returns:
+            List of tuples with the range of a page and the object IDs within it.
+        """
+        pages = []
+        for first, last in self.ranges():
+            start = bisect_left(object_ids, first)
+            end = bisect_right(object_ids, last)
+            pages.append((first, last, object_ids[start:end]))
+        return pages
+
+    def save(self, object_ids: list[int], table: pa.Table) -> None:
+        """Save a completed page, writing to a temporary file first.
+
+        Args:
+            object_ids: Sorted object IDs making up the page.
+            table: Page as an Arrow table.
+        """
+        self.path.mkdir(exist_ok=True, parents=True)
+        file_path = self.path / f"{object_ids[0]}-{object_ids[-1]}.arrow"
+        tmp_path = file_path.with_suffix(".tmp")
+        write_feather(table, tmp_path)
+        tmp_path.replace(file_path)
+
+    def read(self, first: int, last: int) -> pa.Table:
+        """Read the saved page covering a range of object IDs."""
+        return read_table(self.path / f"{first}-{last}.arrow")
+
+    def load(self) -> Iterator[pa.Table]:
+        """Load every saved page in order of object ID, one at a time."""
+        for first, last in self.ranges():
+            yield self.read(first, last)
+
+    def clear(self) -> None:
+        """Remove every saved page."""
+        rmtree(self.path, ignore_errors=True)
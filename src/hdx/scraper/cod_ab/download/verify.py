@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+from shapely import from_wkb, get_type_id, is_empty, is_missing
+
+POINT = 1
+LINE = 2
+POLYGON = 3
+
+# Shapely geometry type IDs accepted for each layer geometry type.
+geom_type_ids = {
+    POINT: [0, 4],
+    LINE: [1, 5],
+    POLYGON: [3, 6],
+}
+
+
+@dataclass
+class Verification:
+    """Result of comparing a downloaded layer with the object IDs on the server."""
+
+    keep: np.ndarray
+    missing: list[int]
+    empty: list[int]
+    duplicated: int
+    unexpected: int
+    wrong_type: int
+
+    @property
+    def refetch(self) -> list[int]:
+        """Object IDs to request from the server again."""
+        return sorted({*self.missing, *self.empty})
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether every object ID is present exactly once with the right geometry."""
+        return not (
+            self.missing or self.duplicated or self.unexpected or self.wrong_type
+        )
+
+
+def main(
+    table: pa.Table,
+    object_id_field: str,
+    object_ids: list[int],
+    geom_type: int,
+) -> Verification:
+    """Verifies a downloaded layer in-process, without reading every feature as text.
+
+    Checks that the object IDs of the layer match those on the server, with none
+    missing and no duplicates, and that every geometry is non-empty and of the
+    expected geometry type.
+
+    Args:
+        table: Downloaded layer as an Arrow table.
+        object_id_field: Name of the object ID field.
+        object_ids: Sorted object IDs of every feature on the server.
+        geom_type: geometry type as integer.
+
+    Returns:
+        Verification with a mask of rows to keep and the object IDs to refetch.
+    """
+    local_ids = table.column(object_id_field).to_numpy()
+    server_ids = np.asarray(object_ids, dtype=local_ids.dtype)
+    _, first = np.unique(local_ids, return_index=True)
+    is_first = np.zeros(len(local_ids), dtype=bool)
+    is_first[first] = True
+    is_expected = np.isin(local_ids, server_ids)
+    geometry = from_wkb(table.column("geometry").to_numpy(zero_copy_only=False))
+    is_blank = is_missing(geometry) | is_empty(geometry)
+    is_wrong_type = ~is_blank & ~np.isin(
+        get_type_id(geometry),
+        geom_type_ids[geom_type],
+    )
+    return Verification(
+        keep=is_first & is_expected & ~is_blank,
+        missing=np.setdiff1d(server_ids, local_ids).tolist(),
+        empty=local_ids[is_blank & is_expected].tolist(),
+        duplicated=int((~is_first).sum()),
+        unexpected=int((~is_expected).sum()),
+        wrong_type=int(is_wrong_type.sum()),
+    )
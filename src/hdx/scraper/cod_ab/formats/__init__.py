@@ -1,69 +1,200 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from logging import getLogger
 from pathlib import Path
 from shutil import rmtree
-from subprocess import run
-
-from hdx.scraper.cod_ab.config import data_dir
-
-
-def to_multilayer(src_dataset: Path, dst_dataset: Path, *, multi: bool) -> None:
-    """Uses OGR2OGR to turn a GeoParquet into a generic layer."""
-    if dst_dataset.suffixes[0] == ".shp":
-        lco = ["-lco", "ENCODING=UTF-8"]
-    elif dst_dataset.suffix == ".gdb":
-        lco = [
-            "-lco",
-            "TARGET_ARCGIS_VERSION=ARCGIS_PRO_3_2_OR_LATER",
-            "-f",
-            "OpenFileGDB",
-        ]
-    else:
-        lco = []
-    if multi:
-        output_options = ["-nln", src_dataset.stem]
+from time import perf_counter
+
+import pyarrow as pa
+from pyogrio import write_arrow
+
+from .cache import ArtifactCache, get_file_digest, get_key
+from .sozip import SOZipWriter
+from hdx.scraper.cod_ab.config import FORMAT_WORKERS, data_dir
+from hdx.scraper.cod_ab.store import LayerStore
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Format:
+    """Output format of the admin boundaries."""
+
+    ext: str
+    driver: str
+    layer_options: dict[str, str] = field(default_factory=dict)
+    multi: bool = True
+    geometry: bool = True
+    zip: bool = False
+
+
+formats = [
+    Format(
+        "gdb",
+        "OpenFileGDB",
+        {"TARGET_ARCGIS_VERSION": "ARCGIS_PRO_3_2_OR_LATER"},
+        zip=True,
+    ),
+    Format("shp.zip", "ESRI Shapefile", {"ENCODING": "UTF-8"}),
+    Format("geojson", "GeoJSON", multi=False, zip=True),
+    Format("xlsx", "XLSX", geometry=False),
+]
+
+
+@dataclass(frozen=True)
+class Source:
+    """Layer to export, loaded once and shared by every format."""
+
+    name: str
+    table: pa.Table
+    geometry_type: str
+    crs: str | None
+
+
+def get_output(iso3: str, fmt: Format) -> Path:
+    """Gets the path of the file exported for a format."""
+    dst_dataset = data_dir / iso3.lower() / f"{iso3.lower()}_cod_ab.{fmt.ext}"
+    return (
+        dst_dataset.with_suffix(dst_dataset.suffix + ".zip") if fmt.zip else dst_dataset
+    )
+
+
+def get_geometry_type(geom_types: set[str]) -> str:
+    """Gets the OGR geometry type of a layer, promoting to multi when mixed."""
+    base_types = {x.removeprefix("Multi") for x in geom_types}
+    if len(base_types) != 1:
+        return "Unknown"
+    base_type = base_types.pop()
+    return f"Multi{base_type}" if len(geom_types) > 1 else geom_types.pop()
+
+
+def get_source(store: LayerStore, name: str) -> Source:
+    """Loads a layer from the store for exporting."""
+    table = store.table(name)
+    extension = table.schema.field("geometry").metadata[b"ARROW:extension:metadata"]
+    crs = json.loads(extension).get("crs")
+    return Source(
+        name=name,
+        table=table,
+        geometry_type=get_geometry_type(set(store.gdf(name).geom_type.dropna())),
+        crs=json.dumps(crs) if crs else None,
+    )
+
+
+def write_layer(
+    source: Source,
+    dst_dataset: Path | BytesIO,
+    fmt: Format,
+    *,
+    append: bool,
+) -> None:
+    """Writes a layer in-process with GDAL.
+
+    Args:
+        source: Layer to export.
+        dst_dataset: Path of the output, or a buffer for single-layer formats.
+        fmt: Output format.
+        append: Whether to add the layer to an existing multi-layer dataset.
+    """
+    if fmt.geometry:
+        geometry = {
+            "geometry_name": "geometry",
+            "geometry_type": source.geometry_type,
+            "crs": source.crs,
+        }
+        table = source.table
     else:
-        dst_dataset.mkdir(exist_ok=True, parents=True)
-        dst_dataset = (dst_dataset / src_dataset.stem).with_suffix(dst_dataset.suffix)
-        output_options = []
-    run(
-        [
-            "ogr2ogr",
-            "-overwrite",
-            *lco,
-            *output_options,
-            dst_dataset,
-            src_dataset,
-        ],
-        check=False,
+        geometry = {}
+        table = source.table.drop_columns(["geometry"])
+    write_arrow(
+        table,
+        dst_dataset,
+        layer=source.name,
+        driver=fmt.driver,
+        append=append,
+        layer_options=fmt.layer_options,
+        **geometry,
     )
 
 
-def main(iso3: str) -> None:
-    """Convert geometries into multiple formats."""
-    for ext, multi in [
-        ("gdb", True),
-        ("shp.zip", True),
-        ("geojson", False),
-        ("xlsx", True),
-    ]:
-        for level in [*range(6), "lines"]:
-            src_dataset = (
-                data_dir / iso3.lower() / f"{iso3.lower()}_admin{level}.parquet"
-            )
-            dst_dataset = data_dir / iso3.lower() / f"{iso3.lower()}_cod_ab.{ext}"
-            if src_dataset.exists():
-                to_multilayer(src_dataset, dst_dataset, multi=multi)
-        if dst_dataset.is_dir():
-            zip_file = dst_dataset.with_suffix(dst_dataset.suffix + ".zip")
-            zip_file.unlink(missing_ok=True)
-            run(
-                [
-                    "sozip",
-                    "--quiet",
-                    "--recurse-paths",
-                    "--junk-paths",
-                    zip_file,
-                    dst_dataset,
-                ],
-                check=False,
-            )
-            rmtree(dst_dataset, ignore_errors=True)
+def export_format(iso3: str, sources: list[Source], fmt: Format) -> float:
+    """Exports every layer of an ISO3 to a single format.
+
+    Layers are written in order of admin level, which is the order of layers in the
+    multi-layer formats. Single-layer formats are written to memory and straight into
+    a SOZip archive, without an intermediate directory. Formats written by GDAL as a
+    directory, such as the File Geodatabase, are packed into a SOZip archive after.
+
+    Args:
+        iso3: ISO3 code of the location.
+        sources: Layers of the location.
+        fmt: Output format.
+
+    Returns:
+        Seconds taken to export the format.
+    """
+    start = perf_counter()
+    dst_dataset = data_dir / iso3.lower() / f"{iso3.lower()}_cod_ab.{fmt.ext}"
+    zip_file = get_output(iso3, fmt)
+    if dst_dataset.is_dir():
+        rmtree(dst_dataset)
+    dst_dataset.unlink(missing_ok=True)
+    if not fmt.multi:
+        with SOZipWriter(zip_file) as writer:
+            for source in sources:
+                buffer = BytesIO()
+                write_layer(source, buffer, fmt, append=False)
+                buffer.seek(0)
+                writer.write(f"{source.name}.{fmt.ext}", buffer)
+        return perf_counter() - start
+    for index, source in enumerate(sources):
+        write_layer(source, dst_dataset, fmt, append=index > 0)
+    if fmt.zip:
+        with SOZipWriter(zip_file) as writer:
+            writer.write_files(sorted(x for x in dst_dataset.rglob("*") if x.is_file()))
+        rmtree(dst_dataset, ignore_errors=True)
+    return perf_counter() - start
+
+
+def main(iso3: str, store: LayerStore, *, use_cache: bool = True) -> None:
+    """Convert geometries into multiple formats.
+
+    Each output is keyed by a hash of the GeoParquet of every layer and the settings
+    of its format, and reused from the artifact cache when nothing has changed. Layers
+    are only loaded from the store when an output needs building, then every format
+    is exported by its own worker, writing in-process with GDAL.
+
+    Args:
+        iso3: ISO3 code of the location.
+        store: Layers of the location.
+        use_cache: Whether to reuse and save outputs in the artifact cache.
+    """
+    cache = ArtifactCache() if use_cache else None
+    names = [
+        name
+        for name in [f"{iso3.lower()}_admin{x}" for x in [*range(6), "lines"]]
+        if name in store
+    ]
+    digests = [get_file_digest(store.path(x)) for x in names]
+    pending = {}
+    for fmt in formats:
+        key = get_key(repr(fmt), *names, *digests)
+        if cache and cache.get(key, get_output(iso3, fmt)):
+            logger.info("Export %s %s: cached", iso3, fmt.ext)
+        else:
+            pending[key] = fmt
+    if not pending:
+        return
+    sources = [get_source(store, name) for name in names]
+    with ThreadPoolExecutor(max_workers=FORMAT_WORKERS) as executor:
+        futures = {
+            key: executor.submit(export_format, iso3, sources, fmt)
+            for key, fmt in pending.items()
+        }
+        for key, future in futures.items():
+            fmt = pending[key]
+            logger.info("Export %s %s: %.1fs", iso3, fmt.ext, future.result())
+            if cache:
+                cache.put(key, get_output(iso3, fmt))
@@ -0,0 +1,96 @@
+import os
+from hashlib import file_digest, sha256
+from pathlib import Path
+from shutil import copyfile
+from threading import Lock
+
+from hdx.scraper.cod_ab.config import CACHE_SIZE_MB, data_dir
+
+cache_dir = data_dir / "cache"
+
+# Increase when the exported output changes for the same layers and settings.
+CACHE_VERSION = 1
+
+
+def get_file_digest(file_path: Path) -> str:
+    """Gets the SHA-256 of a file's content."""
+    with file_path.open("rb") as f:
+        return file_digest(f, "sha256").hexdigest()
+
+
+def get_key(*parts: str) -> str:
+    """Gets the cache key of an output from the digests and settings of its inputs."""
+    digest = sha256(str(CACHE_VERSION).encode())
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Exported outputs, addressed by a hash of everything they were built from.
+
+    Outputs are kept as files named after their key, with the modification time
+    updated on every hit. When the total size goes over the cap, the least recently
+    used outputs are removed. Files are written to a temporary name first, so that
+    worker processes sharing the cache never see a partial output.
+    """
+
+    def __init__(self, size_mb: int = CACHE_SIZE_MB) -> None:
+        """Open the cache.
+
+        Args:
+            size_mb: Size cap of the cache.
+        """
+        self.size = size_mb * 1_000_000
+        self.lock = Lock()
+        cache_dir.mkdir(exist_ok=True, parents=True)
+
+    def get(self, key: str, dst: Path) -> bool:
+        """Copy a cached output to its destination.
+
+        Args:
+            key: Cache key of the output.
+            dst: Path to copy the output to.
+
+        Returns:
+            True if the output was cached, otherwise false.
+        """
+        path = cache_dir / key
+        try:
+            copyfile(path, dst)
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, src: Path) -> None:
+        """Add an output to the cache, then evict outputs over the size cap.
+
+        Args:
+            key: Cache key of the output.
+            src: Path of the output.
+        """
+        path = cache_dir / key
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        copyfile(src, tmp_path)
+        tmp_path.replace(path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used outputs while over the size cap."""
+        with self.lock:
+            files = []
+            for path in cache_dir.iterdir():
+                if path.suffix != ".tmp":
+                    try:
+                        files.append((path.stat(), path))
+                    except FileNotFoundError:
+                        continue
+            files.sort(key=lambda x: x[0].st_mtime)
+            total = sum(stat.st_size for stat, _ in files)
+            for stat, path in files:
+                if total <= self.size:
+                    break
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
@@ -0,0 +1,325 @@
+import struct
+import zlib
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import SEEK_END
+from pathlib import Path
+from time import localtime
+from typing import BinaryIO
+
+from hdx.scraper.cod_ab.config import ZIP_WORKERS
+
+# Size of the chunks which can be decompressed independently, as used by GDAL.
+CHUNK_SIZE = 32_768
+
+# Chunks read from a file at a time for each worker, bounding the memory used.
+CHUNKS_PER_WORKER = 8
+
+# Members smaller than this are not given an index, as with GDAL's default.
+SOZIP_MIN_FILE_SIZE = 1_048_576
+
+# Upper bound on the bytes deflate and the flushes add to each chunk.
+CHUNK_OVERHEAD = 64
+
+COMPRESSION_LEVEL = 6
+DEFLATED = 8
+STORED = 0
+UTF8 = 0x0800
+
+# Sizes and offsets from which ZIP64 records are needed.
+ZIP64_LIMIT = 0xFFFF_FFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+# Value of a size or offset field whose value is in the ZIP64 extra field instead.
+ZIP64_MARKER = 0xFFFF_FFFF
+ZIP64_COUNT_MARKER = 0xFFFF
+
+
+@dataclass
+class Member:
+    """A file compressed in the zip archive, with the offsets of its chunks."""
+
+    name: str
+    method: int
+    crc: int
+    size: int
+    compressed_size: int
+    offsets: list[int]
+
+
+def compress_chunk(chunk: bytes, *, last: bool) -> bytes:
+    """Compresses a chunk as raw deflate which can be concatenated with others.
+
+    Every chunk except the last ends with a sync flush followed by a full flush, as
+    written by GDAL. This aligns the output to a byte boundary and resets the
+    dictionary, so decompression can start at any chunk.
+    """
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    data = compressor.compress(chunk)
+    if last:
+        return data + compressor.flush(zlib.Z_FINISH)
+    return (
+        data + compressor.flush(zlib.Z_SYNC_FLUSH) + compressor.flush(zlib.Z_FULL_FLUSH)
+    )
+
+
+def get_size(file: BinaryIO) -> int:
+    """Gets the size of a file from its current position, which is kept."""
+    position = file.tell()
+    size = file.seek(0, SEEK_END) - position
+    file.seek(position)
+    return size
+
+
+def is_zip64(size: int) -> bool:
+    """Checks if a member of this size could need ZIP64 sizes once compressed."""
+    chunks = size // CHUNK_SIZE + 1
+    return size + chunks * CHUNK_OVERHEAD >= ZIP64_LIMIT
+
+
+def get_field(value: int) -> int:
+    """Gets the value of a 32-bit size or offset field, marked if kept in ZIP64."""
+    return ZIP64_MARKER if value >= ZIP64_LIMIT else value
+
+
+def get_index(member: Member) -> tuple[str, bytes]:
+    """Gets the SOZip index of a compressed member, stored as a hidden file.
+
+    Returns:
+        Tuple of the name and content of the index.
+    """
+    header = struct.pack(
+        "<IIIIQQ",
+        1,
+        0,
+        CHUNK_SIZE,
+        8,
+        member.size,
+        member.compressed_size,
+    )
+    data = header + b"".join(struct.pack("<Q", x) for x in member.offsets)
+    parent, _, base = member.name.rpartition("/")
+    name = f"{parent}/.{base}.sozip.idx" if parent else f".{base}.sozip.idx"
+    return name, data
+
+
+def get_dos_time() -> tuple[int, int]:
+    """Gets the current time and date in MS-DOS format."""
+    now = localtime()
+    dos_time = now.tm_hour << 11 | now.tm_min << 5 | now.tm_sec // 2
+    dos_date = (now.tm_year - 1980) << 9 | now.tm_mon << 5 | now.tm_mday
+    return dos_time, dos_date
+
+
+class SOZipWriter:
+    """Writes a Seek-Optimized ZIP archive member by member.
+
+    Members are read and compressed a few chunks at a time, so only those chunks are
+    held in memory, and written straight to the archive. The local header is written
+    first with empty sizes, then rewritten in place once the member is compressed.
+
+    Members larger than SOZIP_MIN_FILE_SIZE are followed by a SOZip index, which lets
+    GDAL and other SOZip readers seek within them without decompressing from the
+    start. Archives remain readable by any ZIP reader.
+    """
+
+    def __init__(self, zip_file: Path) -> None:
+        """Create an empty archive.
+
+        Args:
+            zip_file: Path of the archive.
+        """
+        self.file = zip_file.open("wb")
+        self.entries: list[tuple[Member, int]] = []
+        self.dos_time, self.dos_date = get_dos_time()
+        self.executor = ThreadPoolExecutor(max_workers=ZIP_WORKERS)
+
+    def __enter__(self) -> "SOZipWriter":
+        """Open the archive."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Finish the archive."""
+        self.close()
+
+    def write(self, name: str, file: BinaryIO) -> None:
+        """Compresses and writes a member, followed by its index if large enough.
+
+        Args:
+            name: Name of the file within the archive.
+            file: Binary file to read the member from, from its current position.
+        """
+        size = get_size(file)
+        zip64 = is_zip64(size)
+        offset = self.file.tell()
+        member = Member(name, DEFLATED, 0, size, 0, [])
+        self.write_header(member, zip64=zip64)
+        member.crc, member.compressed_size, member.offsets = self.compress(file, size)
+        end = self.file.tell()
+        self.file.seek(offset)
+        self.write_header(member, zip64=zip64)
+        self.file.seek(end)
+        self.entries.append((member, offset))
+        if member.size >= SOZIP_MIN_FILE_SIZE:
+            self.write_stored(*get_index(member))
+
+    def write_files(self, files: Iterable[Path]) -> None:
+        """Writes files from disk, each named after its file name only."""
+        for file in files:
+            with file.open("rb") as f:
+                self.write(file.name, f)
+
+    def compress(self, file: BinaryIO, size: int) -> tuple[int, int, list[int]]:
+        """Compresses a file into the archive, with its chunks compressed in parallel.
+
+        Chunks are read in batches of CHUNKS_PER_WORKER for each worker, compressed on
+        the thread pool, as zlib releases the GIL, and written in order.
+
+        Args:
+            file: Binary file to read the member from.
+            size: Number of bytes to read.
+
+        Returns:
+            Tuple of the CRC-32 of the file, its compressed size, and the offset of
+            every chunk after the first.
+        """
+        batch_size = CHUNK_SIZE * CHUNKS_PER_WORKER * ZIP_WORKERS
+        crc = 0
+        compressed_size = 0
+        offsets = []
+        position = 0
+        while True:
+            data = memoryview(file.read(min(batch_size, size - position)))
+            crc = zlib.crc32(data, crc)
+            position += len(data)
+            final = position >= size or not len(data)
+            chunks = self.executor.map(
+                lambda x: compress_chunk(
+                    data[x : x + CHUNK_SIZE],
+                    last=final and x + CHUNK_SIZE >= len(data),
+                ),
+                range(0, len(data), CHUNK_SIZE) or [0],
+            )
+            for chunk in chunks:
+                if compressed_size:
+                    offsets.append(compressed_size)
+                self.file.write(chunk)
+                compressed_size += len(chunk)
+            if final:
+                return crc, compressed_size, offsets
+
+    def write_stored(self, name: str, data: bytes) -> None:
+        """Writes a small member without compression."""
+        member = Member(name, STORED, zlib.crc32(data), len(data), len(data), [])
+        offset = self.file.tell()
+        self.write_header(member, zip64=is_zip64(len(data)))
+        self.file.write(data)
+        self.entries.append((member, offset))
+
+    def write_header(self, member: Member, *, zip64: bool) -> None:
+        """Writes the local header of a member.
+
+        Args:
+            member: Member to write the header of.
+            zip64: Whether the sizes are in a ZIP64 extra field, decided before the
+            member is compressed so that the header keeps its length.
+        """
+        name = member.name.encode()
+        extra = b""
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, member.size, member.compressed_size)
+        elif member.compressed_size >= ZIP64_LIMIT:
+            raise RuntimeError(f"{member.name}: compressed size needs ZIP64")
+        self.file.write(
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x0403_4B50,
+                45 if zip64 else 20,
+                UTF8,
+                member.method,
+                self.dos_time,
+                self.dos_date,
+                member.crc,
+                ZIP64_MARKER if zip64 else member.compressed_size,
+                ZIP64_MARKER if zip64 else member.size,
+                len(name),
+                len(extra),
+            ),
+        )
+        self.file.write(name + extra)
+
+    def close(self) -> None:
+        """Writes the central directory and closes the archive."""
+        self.executor.shutdown()
+        start = self.file.tell()
+        for member, offset in self.entries:
+            name = member.name.encode()
+            fields = [
+                x
+                for x in [member.size, member.compressed_size, offset]
+                if x >= ZIP64_LIMIT
+            ]
+            extra = b""
+            if fields:
+                extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields)
+            self.file.write(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x0201_4B50,
+                    45,
+                    45 if fields else 20,
+                    UTF8,
+                    member.method,
+                    self.dos_time,
+                    self.dos_date,
+                    member.crc,
+                    get_field(member.compressed_size),
+                    get_field(member.size),
+                    len(name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    0,
+                    get_field(offset),
+                ),
+            )
+            self.file.write(name + extra)
+        end = self.file.tell()
+        count = len(self.entries)
+        if (
+            count >= ZIP64_COUNT_LIMIT
+            or start >= ZIP64_LIMIT
+            or end - start >= ZIP64_LIMIT
+        ):
+            self.file.write(
+                struct.pack(
+                    "<IQHHIIQQQQ",
+                    0x0606_4B50,
+                    44,
+                    45,
+                    45,
+                    0,
+                    0,
+                    count,
+                    count,
+                    end - start,
+                    start,
+                ),
+            )
+            self.file.write(struct.pack("<IIQI", 0x0706_4B50, 0, end, 1))
+        self.file.write(
+            struct.pack(
+                "<IHHHHIIH",
+                0x0605_4B50,
+                0,
+                0,
+                ZIP64_COUNT_MARKER if count >= ZIP64_COUNT_LIMIT else count,
+                ZIP64_COUNT_MARKER if count >= ZIP64_COUNT_LIMIT else count,
+                get_field(end - start),
+                get_field(start),
+                0,
+            ),
+        )
+        self.file.close()
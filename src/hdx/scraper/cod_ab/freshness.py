@@ -0,0 +1,96 @@
+import asyncio
+from logging import getLogger
+
+from hdx.scraper.cod_ab.config import CONCURRENCY
+from hdx.scraper.cod_ab.utils import (
+    async_client_get,
+    close_async_client,
+    get_arcgis_metadata_url,
+    get_hdx_updates,
+    parse_arcgis_update,
+    token_provider,
+)
+
+logger = getLogger(__name__)
+
+
+async def get_arcgis_update(semaphore: asyncio.Semaphore, iso3: str) -> str | None:
+    """Get the date an ArcGIS Server service was last updated.
+
+    Errors are caught per location so that one failing service can't abort the
+    others, returning None so that the location is planned and fails on its own.
+    """
+    try:
+        token = await token_provider.get_async()
+        async with semaphore:
+            r = await async_client_get(
+                get_arcgis_metadata_url(iso3),
+                params={"token": token},
+            )
+        return parse_arcgis_update(r.text)
+    except Exception:
+        logger.exception("Probe failed, planning anyway: %s", iso3)
+        return None
+
+
+async def get_hdx_dates() -> dict[str, str]:
+    """Get the date every COD-AB dataset on HDX was last modified.
+
+    If the search fails, no dates are returned so that every location is planned.
+    """
+    try:
+        return await asyncio.to_thread(get_hdx_updates)
+    except Exception:
+        logger.exception("HDX search failed, planning every location")
+        return {}
+
+
+async def probe(iso3_list: list[str]) -> dict[str, tuple[str | None, str]]:
+    """Fetch ArcGIS and HDX update dates for every location concurrently.
+
+    ArcGIS requests share the pooled async HTTP/2 client, with a semaphore limiting
+    the number of requests in flight at any one time. HDX dates come from a single
+    bulk search running alongside them.
+
+    Args:
+        iso3_list: ISO3 codes of the locations to probe.
+
+    Returns:
+        Dictionary of ISO3 codes with a tuple of ArcGIS and HDX update dates, where
+        the ArcGIS date is None if it could not be fetched.
+    """
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    arcgis_updates = asyncio.gather(
+        *[get_arcgis_update(semaphore, x) for x in iso3_list],
+    )
+    try:
+        arcgis, hdx = await asyncio.gather(arcgis_updates, get_hdx_dates())
+    finally:
+        await close_async_client()
+    return {
+        iso3: (arcgis_update, hdx.get(f"cod-ab-{iso3.lower()}", ""))
+        for iso3, arcgis_update in zip(iso3_list, arcgis, strict=True)
+    }
+
+
+def main(iso3_list: list[str]) -> list[str]:
+    """Plans which locations need processing before any processing starts.
+
+    A location needs processing when its ArcGIS Server service was updated on or after
+    the date its HDX dataset was last modified, or when its update date could not be
+    fetched.
+
+    Args:
+        iso3_list: ISO3 codes of the locations available on the ArcGIS server.
+
+    Returns:
+        ISO3 codes of the locations which need processing.
+    """
+    updates = asyncio.run(probe(iso3_list))
+    plan = [
+        iso3
+        for iso3, (arcgis_update, hdx_update) in updates.items()
+        if arcgis_update is None or arcgis_update >= hdx_update
+    ]
+    logger.info("Planned %d of %d locations: %s", len(plan), len(updates), plan)
+    return plan
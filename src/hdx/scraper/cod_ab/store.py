@@ -0,0 +1,147 @@
+import json
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from geopandas import GeoDataFrame
+
+from hdx.scraper.cod_ab.config import STORE_MEMORY_MB, data_dir
+
+# Pandas types of the attribute columns of a layer by their Arrow type, the nullable
+# types given by "convert_dtypes" and kept in the pandas metadata of GeoParquet.
+# Other types use the defaults of "to_pandas".
+pandas_types = {
+    pa.string(): pd.StringDtype(),
+    pa.large_string(): pd.StringDtype(),
+    pa.bool_(): pd.BooleanDtype(),
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.float32(): pd.Float32Dtype(),
+    pa.float64(): pd.Float64Dtype(),
+    pa.date32(): pd.ArrowDtype(pa.date32()),
+}
+
+
+def to_geodataframe(table: pa.Table) -> GeoDataFrame:
+    """Builds a GeoDataFrame from a layer, with the column types checks expect.
+
+    "GeoDataFrame.from_arrow" converts attributes with the defaults of "to_pandas",
+    which gives strings and dates as objects and integers with nulls as floats. So only
+    the geometry is converted by GeoPandas, and the attributes are given the types
+    they had when read from a GeoParquet with pandas metadata.
+
+    Args:
+        table: Layer as an Arrow table with a geoarrow WKB geometry column.
+
+    Returns:
+        Layer as a GeoDataFrame.
+    """
+    geometry = GeoDataFrame.from_arrow(table.select(["geometry"]), geometry="geometry")
+    df = table.drop_columns(["geometry"]).to_pandas(types_mapper=pandas_types.get)
+    df.insert(table.schema.get_field_index("geometry"), "geometry", geometry.geometry)
+    return GeoDataFrame(df, geometry="geometry", crs=geometry.crs)
+
+
+def read_layer(file_path: Path) -> pa.Table:
+    """Reads a GeoParquet layer as an Arrow table with a geoarrow WKB geometry column.
+
+    Covering columns are dropped, and the CRS is moved from the GeoParquet metadata to
+    the geometry field, matching the tables produced by the download stage.
+
+    Args:
+        file_path: Path of a GeoParquet with WKB geometries.
+
+    Returns:
+        Layer as an Arrow table.
+    """
+    table = pq.read_table(file_path)
+    geo = json.loads(table.schema.metadata[b"geo"])
+    name = geo["primary_column"]
+    column = geo["columns"][name]
+    covering = [x[0] for x in column.get("covering", {}).get("bbox", {}).values()]
+    table = table.drop_columns(sorted(set(covering))).replace_schema_metadata()
+    index = table.schema.get_field_index(name)
+    field = table.schema.field(index).with_metadata(
+        {
+            b"ARROW:extension:name": b"geoarrow.wkb",
+            b"ARROW:extension:metadata": json.dumps({"crs": column.get("crs")}),
+        },
+    )
+    return table.set_column(index, field.with_name("geometry"), table.column(index))
+
+
+class LayerStore:
+    """Post-processed layers of an ISO3, shared by every stage.
+
+    Layers are held in memory as Arrow tables, with the GeoDataFrame built from each
+    one cached alongside it, so that later stages neither decode the GeoParquet again
+    nor rebuild GEOS geometries. Every layer is also saved as GeoParquet by the
+    download stage. When the tables in memory go over the budget, the least recently
+    used layers are released, and read back from their GeoParquet when next needed.
+    """
+
+    def __init__(self, iso3: str, budget_mb: int = STORE_MEMORY_MB) -> None:
+        """Create an empty store for an ISO3.
+
+        Args:
+            iso3: ISO3 code of the location.
+            budget_mb: Memory budget for the Arrow tables, 0 for no limit.
+        """
+        self.iso3_dir = data_dir / iso3.lower()
+        self.budget = budget_mb * 1_000_000
+        self.tables: OrderedDict[str, pa.Table] = OrderedDict()
+        self.gdfs: dict[str, GeoDataFrame] = {}
+
+    def __contains__(self, name: str) -> bool:
+        """Whether a layer has been saved."""
+        return name in self.tables or self.path(name).exists()
+
+    def path(self, name: str) -> Path:
+        """Get the path of the GeoParquet of a layer."""
+        return self.iso3_dir / f"{name}.parquet"
+
+    def put(self, name: str, table: pa.Table) -> None:
+        """Add a layer which has already been saved as GeoParquet.
+
+        Args:
+            name: Name of the layer, the stem of its GeoParquet.
+            table: Layer as an Arrow table.
+        """
+        self.tables[name] = table
+        self.tables.move_to_end(name)
+        self.gdfs.pop(name, None)
+        self.spill()
+
+    def table(self, name: str) -> pa.Table:
+        """Get a layer as an Arrow table, reading it from disk if released."""
+        if name not in self.tables:
+            self.tables[name] = read_layer(self.path(name))
+        self.tables.move_to_end(name)
+        table = self.tables[name]
+        self.spill()
+        return table
+
+    def gdf(self, name: str) -> GeoDataFrame:
+        """Get a layer as a GeoDataFrame, building it once from the Arrow table."""
+        table = self.table(name)
+        if name not in self.gdfs:
+            self.gdfs[name] = to_geodataframe(table)
+        return self.gdfs[name]
+
+    def spill(self) -> None:
+        """Release the least recently used layers while over the memory budget.
+
+        The most recently used layer is always kept.
+        """
+        if not self.budget:
+            return
+        while (
+            len(self.tables) > 1
+            and sum(x.nbytes for x in self.tables.values()) > self.budget
+        ):
+            name, _ = self.tables.popitem(last=False)
+            self.gdfs.pop(name, None)
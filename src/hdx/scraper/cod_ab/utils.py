@@ -1,11 +1,17 @@
+import asyncio
 import re
+from dataclasses import dataclass
+from functools import cache
+from os import getpid
 from pathlib import Path
-from typing import Any, Literal
+from threading import Lock
+from time import time
+from typing import Literal
 
 import pandas as pd
 from defusedxml.ElementTree import fromstring
 from geopandas import GeoDataFrame
-from httpx import Client, Response
+from httpx import AsyncClient, Client, Limits, Response, Timeout
 from pandas import DataFrame, to_datetime
 from tenacity import retry, stop_after_attempt, wait_fixed
 
@@ -14,21 +20,156 @@ from .config import (
     ARCGIS_SERVER,
     ARCGIS_USERNAME,
     ATTEMPT,
+    CONCURRENCY,
+    HDX_ROWS,
+    KEEPALIVE,
     TIMEOUT,
+    TIMEOUT_DOWNLOAD,
+    TOKEN_EXPIRATION,
+    TOKEN_REFRESH_MARGIN,
     WAIT,
     services_url,
 )
 
+timeout_metadata = Timeout(TIMEOUT)
+timeout_download = Timeout(TIMEOUT_DOWNLOAD, connect=TIMEOUT)
+limits = Limits(
+    max_connections=CONCURRENCY,
+    max_keepalive_connections=CONCURRENCY,
+    keepalive_expiry=KEEPALIVE,
+)
+
+
+@dataclass(frozen=True)
+class RequestCounts:
+    """Connections opened and requests made, over a run or a single location."""
+
+    connections: int = 0
+    requests: int = 0
+
+    def __add__(self, other: "RequestCounts") -> "RequestCounts":
+        """Sum the counts of two periods."""
+        return RequestCounts(
+            self.connections + other.connections,
+            self.requests + other.requests,
+        )
+
+    def __sub__(self, other: "RequestCounts") -> "RequestCounts":
+        """Get the counts made since an earlier snapshot."""
+        return RequestCounts(
+            self.connections - other.connections,
+            self.requests - other.requests,
+        )
+
+    def __str__(self) -> str:
+        """Summarise the counts."""
+        return f"{self.requests} requests over {self.connections} connections"
+
+
+class ClientStats:
+    """Counts connections opened and requests made by the shared HTTP clients.
+
+    Counters are kept per process, so forked workers each start from their parent's
+    counts. Take a snapshot with `counts` before and after a task to get its own.
+    """
+
+    def __init__(self) -> None:
+        """Initialise all counters at zero."""
+        self._lock = Lock()
+        self.connections = 0
+        self.requests = 0
+
+    def __repr__(self) -> str:
+        """Summarise the counters."""
+        return str(self.counts())
+
+    def counts(self) -> RequestCounts:
+        """Get a snapshot of the counters."""
+        with self._lock:
+            return RequestCounts(self.connections, self.requests)
+
+    def add(self, *, connections: int = 0, requests: int = 0) -> None:
+        """Increment the counters."""
+        with self._lock:
+            self.connections += connections
+            self.requests += requests
+
+    def trace(self, event_name: str, _info: dict) -> None:
+        """HTTPCore trace callback counting new TCP connections."""
+        if event_name == "connection.connect_tcp.complete":
+            self.add(connections=1)
+
+    async def trace_async(self, event_name: str, info: dict) -> None:
+        """HTTPCore trace callback counting new TCP connections for async clients."""
+        self.trace(event_name, info)
+
+
+client_stats = ClientStats()
+_clients: dict[int, Client] = {}
+_async_clients: dict[asyncio.AbstractEventLoop, AsyncClient] = {}
+
+
+def get_client() -> Client:
+    """Get the long-lived HTTP/2 client for the current process.
+
+    Clients are keyed by process id so that forked workers never share the sockets of
+    a client created by their parent.
+    """
+    pid = getpid()
+    if pid not in _clients:
+        _clients[pid] = Client(http2=True, timeout=timeout_metadata, limits=limits)
+    return _clients[pid]
+
+
+def get_async_client() -> AsyncClient:
+    """Get the long-lived async HTTP/2 client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncClient(
+            http2=True,
+            timeout=timeout_metadata,
+            limits=limits,
+        )
+    return _async_clients[loop]
+
+
+async def close_async_client() -> None:
+    """Close the async client for the running event loop before the loop ends."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 
 @retry(stop=stop_after_attempt(ATTEMPT), wait=wait_fixed(WAIT))
 def client_get(
     url: str,
-    timeout: int = TIMEOUT,
+    timeout: Timeout = timeout_metadata,
     params: dict | None = None,
 ) -> Response:
     """HTTP GET with retries, waiting, and longer timeouts."""
-    with Client(http2=True, timeout=timeout) as client:
-        return client.get(url, params=params)
+    client_stats.add(requests=1)
+    return get_client().get(
+        url,
+        params=params,
+        timeout=timeout,
+        extensions={"trace": client_stats.trace},
+    )
+
+
+@retry(stop=stop_after_attempt(ATTEMPT), wait=wait_fixed(WAIT))
+async def async_client_get(
+    url: str,
+    timeout: Timeout = timeout_metadata,
+    params: dict | None = None,
+) -> Response:
+    """Async HTTP GET with retries, waiting, and longer timeouts."""
+    client_stats.add(requests=1)
+    return await get_async_client().get(
+        url,
+        params=params,
+        timeout=timeout,
+        extensions={"trace": client_stats.trace_async},
+    )
 
 
 def read_csv(file_path: Path | str, *, datetime_to_date: bool = False) -> DataFrame:
@@ -56,23 +197,76 @@ def read_csv(file_path: Path | str, *, datetime_to_date: bool = False) -> DataFr
     return df_csv
 
 
-def generate_token() -> str:
-    """Generate a token for ArcGIS Server."""
+def generate_token() -> tuple[str, float]:
+    """Generate a token for ArcGIS Server.
+
+    Returns:
+        Tuple of the token and the time it expires as seconds since the epoch.
+    """
     url = f"{ARCGIS_SERVER}/portal/sharing/rest/generateToken"
     data = {
         "username": ARCGIS_USERNAME,
         "password": ARCGIS_PASSWORD,
         "referer": f"{ARCGIS_SERVER}/portal",
+        "expiration": TOKEN_EXPIRATION,
         "f": "json",
     }
-    with Client(http2=True) as client:
-        r = client.post(url, data=data).json()
-        return r["token"]
+    client_stats.add(requests=1)
+    r = (
+        get_client()
+        .post(
+            url,
+            data=data,
+            extensions={"trace": client_stats.trace},
+        )
+        .json()
+    )
+    return r["token"], r["expires"] / 1000
+
+
+class TokenProvider:
+    """Process-wide cache for an ArcGIS Server token.
+
+    A new token is only requested from the portal when none has been generated yet,
+    or when the current one is within the refresh margin of expiring. A lock makes
+    this safe to share between threads, and asyncio tasks can await the token without
+    blocking the event loop while it is refreshed.
+    """
+
+    def __init__(self, refresh_margin: int = TOKEN_REFRESH_MARGIN) -> None:
+        """Initialise an empty token cache.
+
+        Args:
+            refresh_margin: Seconds before expiry at which the token is refreshed.
+        """
+        self.refresh_margin = refresh_margin
+        self._lock = Lock()
+        self._token = ""
+        self._expires = 0.0
+
+    def get(self) -> str:
+        """Get the cached token, refreshing it if it is about to expire."""
+        with self._lock:
+            if time() >= self._expires - self.refresh_margin:
+                self._token, self._expires = generate_token()
+            return self._token
+
+    async def get_async(self) -> str:
+        """Get the cached token from within an asyncio task."""
+        return await asyncio.to_thread(self.get)
+
+
+token_provider = TokenProvider()
+
+
+def get_token() -> str:
+    """Get a valid token for ArcGIS Server from the process-wide cache."""
+    return token_provider.get()
 
 
 def get_iso3_list() -> list[str]:
     """Gets a list of ISO3 codes available on the FIS ArcGIS server."""
-    params = {"f": "json", "token": generate_token()}
+    params = {"f": "json", "token": get_token()}
     services = client_get(services_url, params=params).json()["services"]
     p = re.compile(r"^Hosted\/cod_[a-z]{3}_ab_standardized$")
     return [
@@ -82,25 +276,44 @@ def get_iso3_list() -> list[str]:
     ]
 
 
-def get_hdx_metadata(iso3: str) -> dict[str, Any]:
-    """Get HDX metadata associated with a COD on HDX."""
-    url = "https://data.humdata.org/api/3/action/package_show"
-    params = {"id": f"cod-ab-{iso3.lower()}"}
-    return client_get(url, TIMEOUT, params).json().get("result")
+@cache
+def get_hdx_updates() -> dict[str, str]:
+    """Get the date every COD-AB dataset on HDX was last modified.
 
+    Paginates through a single "package_search" query rather than calling
+    "package_show" once per location, sorted by name so that pages don't shift
+    between requests. The result is cached for the rest of the run.
 
-def get_hdx_update(iso3: str) -> str:
-    """Get the date an HDX dataset was last updated."""
-    return get_hdx_metadata(iso3)["last_modified"][:10]
+    Returns:
+        Dictionary of HDX dataset names with the date they were last modified.
+    """
+    url = "https://data.humdata.org/api/3/action/package_search"
+    updates = {}
+    start = 0
+    while True:
+        params = {
+            "fq": r"name:cod\-ab\-*",
+            "sort": "name asc",
+            "rows": HDX_ROWS,
+            "start": start,
+        }
+        result = client_get(url, timeout_metadata, params).json()["result"]
+        for dataset in result["results"]:
+            updates[dataset["name"]] = (dataset.get("last_modified") or "")[:10]
+        start += HDX_ROWS
+        if start >= result["count"] or not result["results"]:
+            return updates
 
 
-def get_arcgis_update(iso3: str) -> str:
-    """Get the date an ArcGIS Server service was last updated."""
-    text = client_get(
-        f"{services_url}/cod_{iso3.lower()}_ab_standardized/FeatureServer/info/metadata",
-        TIMEOUT,
-        {"token": generate_token()},
-    ).text
+def get_arcgis_metadata_url(iso3: str) -> str:
+    """Get the URL of the metadata document for an ArcGIS Server service."""
+    return (
+        f"{services_url}/cod_{iso3.lower()}_ab_standardized/FeatureServer/info/metadata"
+    )
+
+
+def parse_arcgis_update(text: str) -> str:
+    """Parse the creation date from an ArcGIS Server metadata document."""
     root = fromstring(text)
     date = root.findtext("Esri/CreaDate")
     if date:
@@ -108,6 +321,16 @@ def get_arcgis_update(iso3: str) -> str:
     return ""
 
 
+def get_arcgis_update(iso3: str) -> str:
+    """Get the date an ArcGIS Server service was last updated."""
+    text = client_get(
+        get_arcgis_metadata_url(iso3),
+        timeout_metadata,
+        {"token": get_token()},
+    ).text
+    return parse_arcgis_update(text)
+
+
 def is_empty(string: str) -> bool:
     """Checks if string is empty."""
     return str(string).strip() == ""
@@ -0,0 +1,85 @@
+"""Benchmark of representative point generation for admin boundary polygons.
+
+Compares the previous per-feature implementation with download.points on synthetic
+multipolygons of varying size and complexity. Run with:
+
+    python tests/benchmark_points.py [features]
+"""
+
+import sys
+from time import perf_counter
+
+import numpy as np
+from geopandas import GeoSeries
+from shapely import MultiPolygon, Polygon, distance, get_exterior_ring, make_valid
+from shapely.ops import polylabel
+
+from hdx.scraper.cod_ab.download.points import (
+    get_largest_parts,
+    get_polylabels,
+    get_tolerance,
+)
+
+
+def make_polygon(rng: np.random.Generator, x: float, y: float, size: float) -> Polygon:
+    """Makes a star-shaped polygon with many vertices."""
+    vertices = rng.integers(50, 500)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+    radii = size * rng.uniform(0.5, 1, vertices)
+    return Polygon(np.c_[x + radii * np.cos(angles), y + radii * np.sin(angles)])
+
+
+def make_geometries(features: int) -> GeoSeries:
+    """Makes a mix of polygons and multipolygons, from 0.001 to 10 degrees wide."""
+    rng = np.random.default_rng(0)
+    geometries = []
+    for _ in range(features):
+        size = 10 ** rng.uniform(-3, 1)
+        parts = [
+            make_polygon(rng, x * 3 * size, 0, size * rng.uniform(0.2, 1))
+            for x in range(rng.integers(1, 6))
+        ]
+        geometries.append(parts[0] if len(parts) == 1 else MultiPolygon(parts))
+    return GeoSeries(geometries, crs=4326)
+
+
+def previous(geometry: GeoSeries) -> GeoSeries:
+    """Previous implementation, applied feature by feature."""
+    geometry = geometry.apply(
+        lambda x: max(x.geoms, key=lambda a: a.area)
+        if x.geom_type == "MultiPolygon"
+        else x,
+    )
+    return geometry.apply(lambda x: polylabel(make_valid(x), tolerance=1e-6))
+
+
+def current(geometry: GeoSeries) -> np.ndarray:
+    """Current implementation, vectorized with a thread pool."""
+    polygons = make_valid(get_largest_parts(geometry.to_numpy()))
+    return get_polylabels(polygons, get_tolerance(polygons))
+
+
+def main(features: int) -> None:
+    """Times both implementations and compares their results."""
+    geometry = make_geometries(features)
+    start = perf_counter()
+    expected = previous(geometry).to_numpy()
+    previous_time = perf_counter() - start
+    start = perf_counter()
+    actual = current(geometry)
+    current_time = perf_counter() - start
+
+    polygons = make_valid(get_largest_parts(geometry.to_numpy()))
+    tolerance = get_tolerance(polygons)
+    expected_radius = distance(expected, get_exterior_ring(polygons))
+    actual_radius = distance(actual, get_exterior_ring(polygons))
+    within = actual_radius >= expected_radius - tolerance - 1e-6
+
+    print(f"features: {features}")
+    print(f"previous: {previous_time:.2f}s")
+    print(f"current:  {current_time:.2f}s ({previous_time / current_time:.1f}x)")
+    print(f"within tolerance: {within.sum()} of {features}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
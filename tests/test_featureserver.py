@@ -0,0 +1,243 @@
+import json
+import re
+from dataclasses import replace
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from httpx import Request, Response
+from shapely import Polygon, to_wkb
+
+from hdx.scraper.cod_ab.download import featureserver, page_sizes, spool
+from hdx.scraper.cod_ab.download.featureserver import ServerError, get_error
+from hdx.scraper.cod_ab.download.metadata import Layer
+from hdx.scraper.cod_ab.download.page_sizes import LADDER, PageSizes
+from hdx.scraper.cod_ab.download.spool import Spool
+from hdx.scraper.cod_ab.download.verify import POLYGON
+from hdx.scraper.cod_ab.download.verify import main as verify
+
+layer = Layer(
+    id=0,
+    name="afg_admin0",
+    geometry_type="esriGeometryPolygon",
+    object_id_field="objectid",
+    max_record_count=2000,
+    last_edit_date=1,
+    query_formats=("JSON",),
+)
+url = "https://example.com/arcgis/rest/services/cod_afg_ab_standardized/FeatureServer/0"
+
+
+def get_feature(object_id: int) -> dict:
+    """Gets a unit square feature placed by its object ID."""
+    x = object_id
+    return {
+        "attributes": {"objectid": object_id, "adm0_pcode": f"AF{object_id}"},
+        "geometry": {"rings": [[[x, 0], [x, 1], [x + 1, 1], [x + 1, 0], [x, 0]]]},
+    }
+
+
+class FeatureServer:
+    """Serves a layer of unit squares, failing pages larger than a number of records.
+
+    Args:
+        object_ids: Object IDs of the layer.
+        max_records: Largest page the server can return without an error.
+        heavy: Object IDs of features which can only be returned one at a time.
+    """
+
+    def __init__(
+        self,
+        object_ids: list[int],
+        max_records: int,
+        heavy: frozenset[int] = frozenset(),
+    ) -> None:
+        self.object_ids = object_ids
+        self.max_records = max_records
+        self.heavy = heavy
+        self.pages: list[list[int]] = []
+
+    def get(self, url: str, _timeout=None, params: dict | None = None) -> Response:
+        """Answers a query of the layer with ESRI JSON."""
+        if params.get("returnIdsOnly"):
+            body = {"objectIdFieldName": "objectid", "objectIds": self.object_ids}
+        elif params.get("returnCountOnly"):
+            body = {"count": len(self.object_ids)}
+        else:
+            first, last = map(int, re.findall(r"\d+", params["where"]))
+            page = [x for x in self.object_ids if first <= x <= last]
+            self.pages.append(page)
+            if len(page) > self.max_records or (len(page) > 1 and self.heavy & {*page}):
+                body = {"error": {"code": 500, "message": "Error performing query"}}
+            else:
+                body = {
+                    "objectIdFieldName": "objectid",
+                    "geometryType": "esriGeometryPolygon",
+                    "spatialReference": {"wkid": 4326},
+                    "fields": [
+                        {"name": "objectid", "type": "esriFieldTypeOID"},
+                        {"name": "adm0_pcode", "type": "esriFieldTypeString"},
+                    ],
+                    "features": [get_feature(x) for x in page],
+                }
+        return Response(200, json=body, request=Request("GET", url))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Keeps the spool and the page sizes in a temporary directory."""
+    monkeypatch.setattr(spool, "spool_dir", tmp_path / "spool")
+    monkeypatch.setattr(page_sizes, "page_sizes_dir", tmp_path / "page_sizes")
+    monkeypatch.setattr(featureserver, "get_token", lambda: "token")
+    return tmp_path
+
+
+def serve(monkeypatch, *args) -> FeatureServer:
+    """Replaces the HTTP client with a fake server for the layer."""
+    server = FeatureServer(*args)
+    monkeypatch.setattr(featureserver, "client_get", server.get)
+    return server
+
+
+def download(data_dir) -> list[int]:
+    """Downloads the layer, returning its object IDs as saved to GeoParquet."""
+    file_path = data_dir / "afg_admin0"
+    featureserver.main(file_path, url, layer, POLYGON)
+    table = pq.read_table(file_path.with_suffix(".parquet"))
+    return [int(x[2:]) for x in table.column("adm0_pcode").to_pylist()]
+
+
+class TestGetError:
+    def test_error(self):
+        assert get_error(b'\n  {"error": {"code": 400}}') == {"code": 400}
+        assert get_error(b'{"code": 1, "error": {"code": 500}}') == {"code": 500}
+
+    def test_page(self):
+        page = {"features": [{"attributes": {"name": '{"error"'}}]}
+        assert get_error(json.dumps(page).encode()) is None
+
+
+class TestDownloadLayer:
+    def test_step_down(self, data_dir, monkeypatch):
+        object_ids = list(range(1, 31))
+        server = serve(monkeypatch, object_ids, 10)
+        assert download(data_dir) == object_ids
+        assert [len(x) for x in server.pages] == [30, 30, 30, 10, 10, 10]
+        assert PageSizes("cod_afg_ab_standardized").ladder(layer.name) == [10, 1]
+        assert not list((data_dir / "spool").rglob("*.arrow"))
+
+    def test_step_up(self, data_dir, monkeypatch):
+        monkeypatch.setattr(page_sizes, "PAGE_SIZE_STEP_UP", 2)
+        object_ids = list(range(1, 31))
+        server = serve(monkeypatch, object_ids, 10)
+        download(data_dir)
+        server.pages.clear()
+        download(data_dir)
+        assert [len(x) for x in server.pages] == [10, 10, 10]
+        assert PageSizes("cod_afg_ab_standardized").ladder(layer.name) == [100, 10, 1]
+        server.pages.clear()
+        assert download(data_dir) == object_ids
+        assert [len(x) for x in server.pages] == [30, 10, 10, 10]
+
+    def test_resume_from_spool(self, data_dir, monkeypatch):
+        object_ids = [*range(1, 11), *range(21, 41)]
+        server = serve(monkeypatch, object_ids, 10)
+        saved = Spool("cod_afg_ab_standardized", layer)
+        saved.save(object_ids[:10], featureserver.get_page(url, layer, object_ids[:10]))
+        server.pages.clear()
+        assert download(data_dir) == object_ids
+        assert sorted(x[0] for x in server.pages) == [21, 21, 21, 21, 31]
+
+    def test_resume_after_step_down(self, data_dir, monkeypatch):
+        # Pages before the heavy feature are kept in the spool when its page fails, so
+        # only the page with the heavy feature is fetched again one step down.
+        server = serve(monkeypatch, list(range(1, 31)), 10, frozenset({25}))
+        monkeypatch.setattr(page_sizes, "LADDER", [10, 1])
+        assert download(data_dir) == list(range(1, 31))
+        assert sorted((x[0], len(x)) for x in server.pages) == [
+            (1, 10),
+            (11, 10),
+            (21, 1),
+            (21, 10),
+            *[(x, 1) for x in range(22, 31)],
+        ]
+
+    def test_server_error(self, data_dir, monkeypatch):
+        serve(monkeypatch, list(range(1, 31)), 10)
+        with pytest.raises(ServerError):
+            featureserver.get_page(url, layer, list(range(1, 31)))
+
+
+class TestRefetch:
+    def test_merge(self, data_dir, monkeypatch):
+        object_ids = list(range(1, 11))
+        server = serve(monkeypatch, [*object_ids, 99], 20)
+        page = featureserver.get_page(url, layer, [*object_ids, 99])
+        # Object ID 4 is missing, 6 is duplicated, 8 has an empty geometry and 99 is
+        # no longer on the server.
+        table = page.take([0, 1, 2, 4, 5, 5, 6, 7, 8, 9, 10])
+        geometry = table.column("geometry").to_pylist()
+        geometry[7] = to_wkb(Polygon())
+        field = table.schema.field("geometry")
+        table = table.set_column(
+            table.schema.get_field_index("geometry"),
+            field,
+            pa.array(geometry, field.type),
+        )
+        result = verify(table, "objectid", object_ids, POLYGON)
+        assert result.refetch == [4, 8]
+        server.pages.clear()
+        table = featureserver.refetch(url, layer, object_ids, 10, table, result)
+        assert server.pages == [[4], [8]]
+        assert table.column("objectid").to_pylist() == object_ids
+        result = verify(table, "objectid", object_ids, POLYGON)
+        assert result.is_complete
+        assert result.refetch == []
+
+
+class TestPageSizes:
+    def test_ladder(self, data_dir):
+        sizes = PageSizes("service")
+        assert sizes.ladder("layer") == LADDER
+        sizes.record("layer", 100)
+        assert PageSizes("service").ladder("layer") == [100, 10, 1]
+
+    def test_step_up(self, data_dir, monkeypatch):
+        monkeypatch.setattr(page_sizes, "PAGE_SIZE_STEP_UP", 3)
+        sizes = PageSizes("service")
+        for _ in range(2):
+            sizes.record("layer", 10)
+        assert sizes.ladder("layer") == [10, 1]
+        sizes.record("layer", 10)
+        assert PageSizes("service").ladder("layer") == [100, 10, 1]
+
+    def test_step_up_reset(self, data_dir, monkeypatch):
+        monkeypatch.setattr(page_sizes, "PAGE_SIZE_STEP_UP", 2)
+        sizes = PageSizes("service")
+        sizes.record("layer", 10)
+        sizes.record("layer", 1)
+        sizes.record("layer", 10)
+        assert sizes.ladder("layer") == [10, 1]
+        assert sizes.sizes["layer"] == {"records": 10, "successes": 1}
+
+
+class TestSpool:
+    def test_missing(self, data_dir, monkeypatch):
+        serve(monkeypatch, list(range(1, 31)), 30)
+        saved = Spool("service", layer)
+        saved.save([5, 6, 7], featureserver.get_page(url, layer, [5, 6, 7]))
+        saved.save([20, 21], featureserver.get_page(url, layer, [20, 21]))
+        object_ids = [*range(1, 11), *range(20, 24)]
+        assert saved.missing(object_ids) == [[1, 2, 3, 4], [8, 9, 10], [22, 23]]
+        pages = Spool("service", layer).load()
+        assert [x.column("objectid").to_pylist() for x in pages] == [
+            [5, 6, 7],
+            [20, 21],
+        ]
+
+    def test_new_version(self, data_dir, monkeypatch):
+        serve(monkeypatch, [1], 1)
+        Spool("service", layer).save([1], featureserver.get_page(url, layer, [1]))
+        edited = replace(layer, last_edit_date=2)
+        assert Spool("service", edited).missing([1]) == [[1]]
+        assert Spool("service", layer).missing([1]) == [[1]]
@@ -0,0 +1,103 @@
+import json
+from io import BytesIO
+
+import pyogrio
+import pytest
+from pyogrio import read_arrow
+
+from hdx.scraper.cod_ab import formats, store
+from hdx.scraper.cod_ab.download.postprocess import to_parquet
+from hdx.scraper.cod_ab.formats import Format, get_output
+from hdx.scraper.cod_ab.store import LayerStore
+
+# Number of features of each admin level, every one splitting its parent in two.
+levels = [1, 2, 4]
+
+
+def get_esri_json(level: int) -> bytes:
+    """Gets a layer of an admin level as ESRI JSON, with strips of a unit square."""
+    fields = [{"name": "objectid", "type": "esriFieldTypeOID"}]
+    for lvl in range(level + 1):
+        fields += [
+            {"name": f"adm{lvl}_name", "type": "esriFieldTypeString"},
+            {"name": f"adm{lvl}_pcode", "type": "esriFieldTypeString"},
+        ]
+    fields += [
+        {"name": "area_sqkm", "type": "esriFieldTypeDouble"},
+        {"name": "valid_on", "type": "esriFieldTypeDate"},
+    ]
+    count = levels[level]
+    features = []
+    for i in range(count):
+        attributes = {"objectid": i + 1}
+        parents = [i * x // count for x in levels[: level + 1]]
+        for lvl in range(level + 1):
+            pcode = "AF" + "".join(f"{x + 1:02d}" for x in parents[1 : lvl + 1])
+            attributes[f"adm{lvl}_name"] = f"Área {lvl}-{parents[lvl]}"
+            attributes[f"adm{lvl}_pcode"] = pcode
+        attributes["area_sqkm"] = 12345.5 / count
+        attributes["valid_on"] = 1577836800000
+        x = i / count
+        ring = [[x, 0], [x, 1], [x + 1 / count, 1], [x + 1 / count, 0], [x, 0]]
+        features.append({"attributes": attributes, "geometry": {"rings": [ring]}})
+    return json.dumps(
+        {
+            "objectIdFieldName": "objectid",
+            "geometryType": "esriGeometryPolygon",
+            "spatialReference": {"wkid": 4326},
+            "fields": fields,
+            "features": features,
+        },
+    ).encode()
+
+
+@pytest.fixture
+def layers(tmp_path, monkeypatch) -> LayerStore:
+    """Downloads three admin levels into a store kept in a temporary directory."""
+    monkeypatch.setattr(formats, "data_dir", tmp_path)
+    monkeypatch.setattr(store, "data_dir", tmp_path)
+    layer_store = LayerStore("AFG")
+    (tmp_path / "afg").mkdir()
+    for level in range(len(levels)):
+        meta, table = read_arrow(BytesIO(get_esri_json(level)))
+        table = table.rename_columns(
+            {meta["geometry_name"] or "wkb_geometry": "geometry"},
+        )
+        file_path = tmp_path / "afg" / f"afg_admin{level}"
+        layer_store.put(file_path.stem, to_parquet(lambda: [table], file_path))
+    return layer_store
+
+
+def get_datasets(fmt: Format) -> dict[str, str]:
+    """Gets the GDAL path of each layer exported for a format."""
+    output = get_output("AFG", fmt)
+    names = [f"afg_admin{x}" for x in range(len(levels))]
+    if fmt.ext == "geojson":
+        return {x: f"/vsizip/{output}/{x}.geojson" for x in names}
+    return dict.fromkeys(names, str(output))
+
+
+class TestFormats:
+    @pytest.mark.parametrize("fmt", formats.formats, ids=lambda x: x.ext)
+    def test_round_trip(self, layers, monkeypatch, fmt):
+        monkeypatch.setattr(formats, "formats", [fmt])
+        formats.main("AFG", layers, use_cache=False)
+        datasets = get_datasets(fmt)
+        if fmt.multi:
+            dataset = next(iter(datasets.values()))
+            assert [x[0] for x in pyogrio.list_layers(dataset)] == list(datasets)
+        for level, (name, dataset) in enumerate(datasets.items()):
+            layer = None if fmt.ext == "geojson" else name
+            info = pyogrio.read_info(dataset, layer=layer)
+            assert info["features"] == levels[level]
+            expected = layers.gdf(name)
+            gdf = pyogrio.read_dataframe(dataset, layer=layer)
+            columns = [x for x in expected.columns if x != "geometry"]
+            assert [x for x in gdf.columns if x != "geometry"] == columns
+            for column in [f"adm{level}_name", f"adm{level}_pcode", "area_sqkm"]:
+                assert gdf[column].tolist() == expected[column].tolist()
+            if fmt.geometry:
+                assert info["crs"] == "EPSG:4326"
+                assert gdf.geometry.geom_equals(expected.geometry).all()
+            else:
+                assert "geometry" not in gdf
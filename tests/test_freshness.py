@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hdx.scraper.cod_ab import freshness
+
+# Metadata documents served by ArcGIS for each location, None if the request fails.
+metadata = {
+    "AFG": "<metadata><Esri><CreaDate>20240301</CreaDate></Esri></metadata>",
+    "SDN": "<metadata><Esri><CreaDate>20240101</CreaDate></Esri></metadata>",
+    "UKR": "<metadata><Esri><CreaDate>",
+    "YEM": None,
+}
+
+# Last modified dates of the datasets on HDX.
+hdx_updates = {
+    "cod-ab-afg": "2024-02-01",
+    "cod-ab-sdn": "2024-02-01",
+    "cod-ab-ukr": "2024-02-01",
+    "cod-ab-yem": "2024-02-01",
+}
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Serves the metadata documents and HDX dates without any network access."""
+
+    async def get_async() -> str:
+        return "token"
+
+    async def async_client_get(url: str, **_kwargs) -> SimpleNamespace:
+        text = metadata[url.split("/cod_")[1][:3].upper()]
+        if text is None:
+            raise ConnectionError(url)
+        return SimpleNamespace(text=text)
+
+    def get_hdx_updates() -> dict[str, str]:
+        return hdx_updates
+
+    monkeypatch.setattr(freshness.token_provider, "get_async", get_async)
+    monkeypatch.setattr(freshness, "async_client_get", async_client_get)
+    monkeypatch.setattr(freshness, "get_hdx_updates", get_hdx_updates)
+
+
+class TestFreshness:
+    def test_failed_probes_are_planned(self, services):
+        assert freshness.main(list(metadata)) == ["AFG", "UKR", "YEM"]
+
+    def test_failed_search_plans_everything(self, services, monkeypatch):
+        def get_hdx_updates() -> dict[str, str]:
+            raise ConnectionError("package_search")
+
+        monkeypatch.setattr(freshness, "get_hdx_updates", get_hdx_updates)
+        assert freshness.main(list(metadata)) == list(metadata)
@@ -0,0 +1,41 @@
+import pytest
+from geopandas import GeoDataFrame
+from shapely import box
+
+from hdx.scraper.cod_ab.checks import geometry_gaps
+from hdx.scraper.cod_ab.checks.context import LayerContext
+
+
+def get_grid(size: int, missing: set[tuple[int, int]]) -> GeoDataFrame:
+    """Gets a grid of unit cells in WGS84, without the missing cells."""
+    cells = [
+        box(x, y, x + 1, y + 1)
+        for x in range(size)
+        for y in range(size)
+        if (x, y) not in missing
+    ]
+    return GeoDataFrame(geometry=cells, crs=4326)
+
+
+def get_row(gdf: GeoDataFrame) -> dict:
+    """Runs the gap check on a single level."""
+    return geometry_gaps.check("AFG", LayerContext("AFG", [gdf]), 0)
+
+
+class TestGeometryGaps:
+    def test_gap_touching_outside(self):
+        # The gap at (1, 1) touches the notch left by (0, 0) at a single vertex,
+        # which a coverage union folds into the shell instead of leaving as a hole.
+        row = get_row(get_grid(4, {(0, 0), (1, 1)}))
+        assert row["geom_gap_area_km"] == pytest.approx(12304.814950072874)
+        assert row["geom_gap_thinness"] == pytest.approx(0.7703161907180069)
+
+    def test_gap_inside(self):
+        row = get_row(get_grid(5, {(2, 2)}))
+        assert row["geom_gap_area_km"] == pytest.approx(12297.517902439853)
+        assert row["geom_gap_thinness"] == pytest.approx(0.7703794487667166)
+
+    def test_no_gaps(self):
+        row = get_row(get_grid(4, set()))
+        assert row["geom_gap_area_km"] is None
+        assert row["geom_gap_thinness"] is None
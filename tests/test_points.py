@@ -0,0 +1,62 @@
+import numpy as np
+from benchmark_points import make_geometries, previous
+from shapely import (
+    MultiPolygon,
+    boundary,
+    box,
+    distance,
+    equals_exact,
+    make_valid,
+    within,
+)
+
+from hdx.scraper.cod_ab.download.points import (
+    get_largest_parts,
+    get_polylabels,
+    get_tolerance,
+)
+
+geometry = make_geometries(200)
+
+
+def get_previous_parts(geometries) -> np.ndarray:
+    """Largest parts as chosen by the previous per-feature implementation."""
+    return np.array(
+        [
+            max(x.geoms, key=lambda a: a.area) if x.geom_type == "MultiPolygon" else x
+            for x in geometries
+        ],
+        dtype=object,
+    )
+
+
+class TestPoints:
+    def test_largest_parts(self):
+        expected = get_previous_parts(geometry)
+        assert equals_exact(get_largest_parts(geometry.to_numpy()), expected).all()
+
+    def test_largest_parts_ties(self):
+        # Parts of equal area keep the first one, as "max" did.
+        geometries = np.array(
+            [
+                MultiPolygon([box(0, 0, 1, 1), box(2, 0, 3, 1), box(4, 0, 6, 1)]),
+                MultiPolygon([box(0, 0, 1, 1), box(2, 0, 3, 1)]),
+                box(0, 0, 2, 2),
+            ],
+        )
+        expected = get_previous_parts(geometries)
+        assert equals_exact(get_largest_parts(geometries), expected).all()
+        assert equals_exact(get_largest_parts(geometries)[1], box(0, 0, 1, 1))
+
+    def test_polylabels(self):
+        # The pole of inaccessibility isn't unique, so labels are compared by the
+        # radius of their inscribed circle, which may only be smaller than that of the
+        # previous labels by the tolerance.
+        polygons = make_valid(get_largest_parts(geometry.to_numpy()))
+        tolerance = get_tolerance(polygons)
+        expected = previous(geometry).to_numpy()
+        actual = get_polylabels(polygons, tolerance)
+        assert within(actual, polygons).all()
+        expected_radius = distance(expected, boundary(polygons))
+        actual_radius = distance(actual, boundary(polygons))
+        assert (actual_radius >= expected_radius - tolerance).all()
@@ -0,0 +1,75 @@
+import json
+from io import BytesIO
+
+import geopandas as gpd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyogrio import read_arrow
+
+from hdx.scraper.cod_ab.download.postprocess import to_parquet
+
+
+def get_page(first: int, last: int, values: dict[str, list]) -> pa.Table:
+    """Gets a page of unit squares as read from ESRI JSON.
+
+    Args:
+        first: First object ID of the page.
+        last: Last object ID of the page.
+        values: Values of each double field, one for every feature.
+    """
+    fields = [{"name": "objectid", "type": "esriFieldTypeOID"}]
+    fields += [{"name": x, "type": "esriFieldTypeDouble"} for x in values]
+    features = [
+        {
+            "attributes": {
+                "objectid": i,
+                **{x: y[i - first] for x, y in values.items()},
+            },
+            "geometry": {"rings": [[[i, 0], [i, 1], [i + 1, 1], [i + 1, 0], [i, 0]]]},
+        }
+        for i in range(first, last + 1)
+    ]
+    esri_json = {
+        "objectIdFieldName": "objectid",
+        "geometryType": "esriGeometryPolygon",
+        "spatialReference": {"wkid": 4326},
+        "fields": fields,
+        "features": features,
+    }
+    meta, table = read_arrow(BytesIO(json.dumps(esri_json).encode()))
+    return table.rename_columns({meta["geometry_name"] or "wkb_geometry": "geometry"})
+
+
+class TestToParquet:
+    def test_pages(self, tmp_path):
+        # The population is only whole in the first page, so it stays a double, while
+        # the area is whole in every page and becomes an integer.
+        pages = [
+            get_page(1, 2, {"area": [1.0, 2.0], "population": [10.0, 20.0]}),
+            get_page(3, 5, {"area": [3.0, None, 5.0], "population": [0.5, 1, 2]}),
+        ]
+        file_path = tmp_path / "afg_admin1"
+        table = to_parquet(lambda: pages, file_path)
+        whole = to_parquet(
+            lambda: [pa.concat_tables(pages)],
+            tmp_path / "afg_admin2",
+        )
+        assert table.equals(whole)
+        assert table.schema.field("area").type == pa.int64()
+        assert table.schema.field("population").type == pa.float64()
+        assert table.column("area").to_pylist() == [1, 2, 3, None, 5]
+        assert table.column("iso3").to_pylist() == ["AFG"] * 5
+        parquet = pq.read_table(file_path.with_suffix(".parquet"))
+        assert parquet.drop_columns(["bbox"]).cast(table.schema).equals(table)
+        assert parquet.column("bbox").to_pylist()[4] == {
+            "xmin": 5.0,
+            "ymin": 0.0,
+            "xmax": 6.0,
+            "ymax": 1.0,
+        }
+        gdf = gpd.read_parquet(file_path.with_suffix(".parquet"))
+        assert gdf.crs.to_epsg() == 4326
+        assert gdf.total_bounds.tolist() == [1.0, 0.0, 6.0, 1.0]
+        geo = json.loads(parquet.schema.metadata[b"geo"])
+        assert geo["columns"]["geometry"]["bbox"] == [1.0, 0.0, 6.0, 1.0]
+        assert geo["columns"]["geometry"]["geometry_types"] == ["Polygon"]
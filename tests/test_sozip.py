@@ -0,0 +1,148 @@
+from io import BytesIO
+from zipfile import ZipFile
+
+import numpy as np
+import pyogrio
+import pytest
+from geopandas import GeoDataFrame
+from shapely import points
+
+from hdx.scraper.cod_ab.formats import sozip
+from hdx.scraper.cod_ab.formats.sozip import CHUNK_SIZE, SOZipWriter
+
+# Contents of members around the chunk, batch and index boundaries.
+rng = np.random.default_rng(0)
+members = {
+    "empty.txt": b"",
+    "small.txt": b"admin boundaries " * 100,
+    "chunks.bin": b"a" * CHUNK_SIZE * 32,
+    "random.bin": rng.bytes(3_000_000),
+    "text.txt": b"adm1_name,adm1_pcode\n" * 250_000 + b"end",
+}
+
+
+@pytest.fixture(scope="module")
+def geojson() -> bytes:
+    """GeoJSON of points larger than the minimum size given a SOZip index."""
+    gdf = GeoDataFrame(
+        {"index": np.arange(20_000)},
+        geometry=points(rng.random((20_000, 2))),
+        crs=4326,
+    )
+    buffer = BytesIO()
+    pyogrio.write_dataframe(gdf, buffer, driver="GeoJSON", layer="points")
+    return buffer.getvalue()
+
+
+def write_files(tmp_path, contents: dict[str, bytes]):
+    """Writes files to disk and packs them into an archive."""
+    files = []
+    for name, data in contents.items():
+        file = tmp_path / name
+        file.write_bytes(data)
+        files.append(file)
+    zip_file = tmp_path / "test.zip"
+    with SOZipWriter(zip_file) as writer:
+        writer.write_files(files)
+    return zip_file
+
+
+def read_sozip(zip_file, name: str, capfd, **kwargs) -> GeoDataFrame:
+    """Reads a member with GDAL, checking it finds a valid SOZip index.
+
+    GDAL writes its debug messages to stderr.
+    """
+    pyogrio.set_gdal_config_options({"CPL_DEBUG": "ON"})
+    try:
+        gdf = pyogrio.read_dataframe(f"/vsizip/{zip_file}/{name}", **kwargs)
+    finally:
+        pyogrio.set_gdal_config_options({"CPL_DEBUG": None})
+    assert f"Found valid SOZIP index: .{name}.sozip.idx" in capfd.readouterr().err
+    return gdf
+
+
+def assert_sozip(zip_file, name: str, capfd) -> None:
+    """Checks GDAL reads from the middle of a member through its SOZip index."""
+    gdf = read_sozip(zip_file, name, capfd, skip_features=15_000, max_features=2)
+    assert gdf["index"].tolist() == [15_000, 15_001]
+
+
+def assert_gdal_members(zip_file, names: list[str]) -> None:
+    """Checks GDAL lists every member of the archive, with the SOZip indexes."""
+    members = pyogrio.vsi_listtree(f"/vsizip/{zip_file}")
+    prefix = len(f"/vsizip/{zip_file}/")
+    assert sorted(x[prefix:] for x in members) == sorted(names)
+
+
+class TestSOZipWriter:
+    def test_testzip(self, tmp_path):
+        zip_file = write_files(tmp_path, members)
+        with ZipFile(zip_file) as archive:
+            assert archive.testzip() is None
+            for name, data in members.items():
+                assert archive.read(name) == data
+            names = archive.namelist()
+            assert {x for x in names if x.endswith(".sozip.idx")} == {
+                ".chunks.bin.sozip.idx",
+                ".random.bin.sozip.idx",
+                ".text.txt.sozip.idx",
+            }
+        assert_gdal_members(zip_file, names)
+
+    def test_gdal_read(self, tmp_path, capfd):
+        # The CSV member is larger than the minimum size, so GDAL reads it through its
+        # SOZip index.
+        zip_file = write_files(tmp_path, {"names.csv": members["text.txt"]})
+        df = read_sozip(zip_file, "names.csv", capfd)
+        assert len(df) == 250_000
+        assert df.columns.tolist() == ["adm1_name", "adm1_pcode"]
+
+    def test_sozip_index(self, tmp_path, geojson, capfd):
+        zip_file = tmp_path / "test.zip"
+        with SOZipWriter(zip_file) as writer:
+            writer.write("points.geojson", BytesIO(geojson))
+        assert_sozip(zip_file, "points.geojson", capfd)
+
+    def test_zip64(self, tmp_path, geojson, capfd, monkeypatch):
+        monkeypatch.setattr(sozip, "ZIP64_LIMIT", 100_000)
+        contents = {**members, "points.geojson": geojson}
+        zip_file = write_files(tmp_path, contents)
+        data = zip_file.read_bytes()
+        assert b"PK\x06\x06" in data
+        with ZipFile(zip_file) as archive:
+            assert archive.testzip() is None
+            for name, content in contents.items():
+                assert archive.read(name) == content
+            assert_gdal_members(zip_file, archive.namelist())
+        assert_sozip(zip_file, "points.geojson", capfd)
+
+    def test_zip64_count(self, tmp_path, geojson, capfd, monkeypatch):
+        monkeypatch.setattr(sozip, "ZIP64_COUNT_LIMIT", 10)
+        contents = {f"{x}.txt": str(x).encode() for x in range(20)}
+        contents["points.geojson"] = geojson
+        zip_file = tmp_path / "test.zip"
+        with SOZipWriter(zip_file) as writer:
+            for name, content in contents.items():
+                writer.write(name, BytesIO(content))
+        data = zip_file.read_bytes()
+        assert b"PK\x06\x06" in data
+        assert data[-22:-12] == b"PK\x05\x06\x00\x00\x00\x00\xff\xff"
+        with ZipFile(zip_file) as archive:
+            assert archive.testzip() is None
+            for name, content in contents.items():
+                assert archive.read(name) == content
+            assert_gdal_members(zip_file, archive.namelist())
+        assert_sozip(zip_file, "points.geojson", capfd)
+
+    def test_zip64_count_limit(self, tmp_path, geojson, capfd):
+        # One more entry than fits in the end of central directory record, with
+        # the SOZip index of the last member.
+        zip_file = tmp_path / "test.zip"
+        with SOZipWriter(zip_file) as writer:
+            for name in range(0xFFFF - 1):
+                writer.write(f"{name}.txt", BytesIO(str(name).encode()))
+            writer.write("points.geojson", BytesIO(geojson))
+        with ZipFile(zip_file) as archive:
+            assert len(archive.namelist()) == 0xFFFF + 1
+            assert archive.read("65533.txt") == b"65533"
+        assert_sozip(zip_file, "points.geojson", capfd)
@@ -0,0 +1,174 @@
+import json
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+from pyogrio import read_arrow
+
+from hdx.scraper.cod_ab.checks import (
+    dates,
+    executor,
+    geometry_valid,
+    languages,
+    table_names,
+    table_other,
+    table_pcodes,
+)
+from hdx.scraper.cod_ab.checks.context import LayerContext
+from hdx.scraper.cod_ab.download.postprocess import to_parquet
+from hdx.scraper.cod_ab.store import LayerStore, read_layer
+
+# Fields of the layer as served by ArcGIS, with the value of every feature.
+fields = {
+    "objectid": ("esriFieldTypeOID", None),
+    "adm0_name": ("esriFieldTypeString", "Afghanistan"),
+    "adm0_pcode": ("esriFieldTypeString", "AF"),
+    "adm0_ref_name": ("esriFieldTypeString", "Afghanistan"),
+    "area_sqkm": ("esriFieldTypeDouble", 12.0),
+    "pop_density": ("esriFieldTypeDouble", 1.5),
+    "lang": ("esriFieldTypeString", "en"),
+    "lang1": ("esriFieldTypeString", None),
+    "lang2": ("esriFieldTypeString", None),
+    "lang3": ("esriFieldTypeString", None),
+    "valid_on": ("esriFieldTypeDate", 1577836800000),
+    "valid_to": ("esriFieldTypeDate", None),
+    "Shape__Area": ("esriFieldTypeDouble", 1.0),
+}
+
+# Check rows of the layer when read from the GeoParquet written by pandas, before
+# layers were shared in memory as Arrow tables.
+expected = {
+    "geometry_valid": {
+        "iso3": "AFG",
+        "level": 0,
+        "geom_count": 3,
+        "geom_empty": 0,
+        "geom_not_polygon": 0,
+        "geom_has_triangle": 0,
+        "geom_has_z": 0,
+        "geom_invalid": 0,
+        "geom_invalid_reason": "",
+        "geom_proj": 4326,
+        "geom_min_x": 1.0,
+        "geom_min_y": 0.0,
+        "geom_max_x": 4.0,
+        "geom_max_y": 1.0,
+        "geom_area_km": 36925.39168,
+        "geom_area_km_attr": 36,
+    },
+    "table_pcodes": {
+        "iso3": "AFG",
+        "level": 0,
+        "pcode_column_levels": 1,
+        "pcode_cell_count": 3,
+        "pcode_empty": 0,
+        "pcode_not_iso": 0,
+        "pcode_not_alnum": 0,
+        "pcode_lengths": 1,
+        "pcode_duplicated": 2,
+        "pcode_not_nested": 0,
+    },
+    "table_names": {
+        "iso3": "AFG",
+        "level": 0,
+        "name_column_levels": 1,
+        "name_column_count": 1,
+        "name_cell_count": 3,
+        "name_empty": 0,
+        "name_empty_column": 0,
+        "name_duplicated": 2,
+        "name_spaces_strip": 0,
+        "name_spaces_double": 0,
+        "name_upper": 0,
+        "name_upper_column": 0,
+        "name_lower": 0,
+        "name_lower_column": 0,
+        "name_numbers": 0,
+        "name_numbers_column": 0,
+        "name_no_valid": 0,
+        "name_invalid": 0,
+        "name_invalid_adm0": 0,
+        "name_invalid_char_count": 0,
+        "name_invalid_chars": "",
+    },
+    "dates": {
+        "iso3": "AFG",
+        "level": 0,
+        "valid_on_type": pd.ArrowDtype(pa.date32()),
+        "valid_on_count": 1,
+        "valid_to_type": pd.ArrowDtype(pa.date32()),
+        "valid_to_exists": 1,
+        "valid_to_empty": 1,
+        "valid_on": pd.Timestamp("2020-01-01").date(),
+    },
+    "languages": {
+        "iso3": "AFG",
+        "level": 0,
+        "language_count": 1,
+        "language_mix": 0,
+        "language_parent": None,
+        "language_invalid": 0,
+        "language_0": "en",
+    },
+    "table_other": {
+        "iso3": "AFG",
+        "level": 0,
+        "ref_name_column_count": 1,
+        "ref_name_columns": "adm0_ref",
+        "other_column_count": 1,
+        "other_columns": "pop_density",
+    },
+}
+
+
+def get_esri_json() -> bytes:
+    """Gets a page of ESRI JSON with three unit squares side by side."""
+    features = [
+        {
+            "attributes": {
+                name: i if name == "objectid" else value
+                for name, (_, value) in fields.items()
+            },
+            "geometry": {"rings": [[[i, 0], [i, 1], [i + 1, 1], [i + 1, 0], [i, 0]]]},
+        }
+        for i in range(1, 4)
+    ]
+    return json.dumps(
+        {
+            "objectIdFieldName": "objectid",
+            "geometryType": "esriGeometryPolygon",
+            "spatialReference": {"wkid": 4326},
+            "fields": [{"name": x, "type": y} for x, (y, _) in fields.items()],
+            "features": features,
+        },
+    ).encode()
+
+
+def get_rows(gdf) -> dict:
+    """Runs the single level checks on a layer."""
+    checks = [geometry_valid, table_pcodes, table_names, dates, languages, table_other]
+    results = executor.run("AFG", LayerContext("AFG", [gdf]), checks)
+    return {executor.get_name(check): rows[0] for check, rows in zip(checks, results)}
+
+
+class TestLayerStore:
+    def test_check_rows(self, tmp_path):
+        meta, table = read_arrow(BytesIO(get_esri_json()))
+        table = table.rename_columns(
+            {meta["geometry_name"] or "wkb_geometry": "geometry"}
+        )
+        file_path = tmp_path / "afg_admin0"
+        store = LayerStore("AFG")
+        store.put("afg_admin0", to_parquet(lambda: [table], file_path))
+        assert get_rows(store.gdf("afg_admin0")) == expected
+
+    def test_check_rows_from_disk(self, tmp_path):
+        meta, table = read_arrow(BytesIO(get_esri_json()))
+        table = table.rename_columns(
+            {meta["geometry_name"] or "wkb_geometry": "geometry"}
+        )
+        file_path = tmp_path / "afg_admin0"
+        to_parquet(lambda: [table], file_path)
+        store = LayerStore("AFG")
+        store.put("afg_admin0", read_layer(file_path.with_suffix(".parquet")))
+        assert get_rows(store.gdf("afg_admin0")) == expected
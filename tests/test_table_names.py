@@ -0,0 +1,128 @@
+import pytest
+from langcodes import tag_is_valid
+from pandas import Series
+
+from hdx.scraper.cod_ab.checks.table_names_config import (
+    exclude_check,
+    punctuation_set,
+)
+from hdx.scraper.cod_ab.checks.table_names_utils import (
+    get_char_set,
+    get_class,
+    get_invalid_chars,
+    get_text,
+    is_invalid,
+    is_punctuation,
+)
+
+# Names in a mix of scripts, with digraphs, combining marks, digits and punctuation.
+names = Series(
+    [
+        "Kabul",
+        "Île-de-France",
+        "Köln (Stadt)",
+        "Ciudad de México",
+        "Αθήνα",
+        "Ϊ́",
+        "Москва",
+        "القاهرة",
+        "Tunis العاصمة",
+        "İstanbul",
+        "i̇stanbul",
+        "Shibuye",
+        "Cʼhastell",
+        "Dzsida",
+        "Llanfair ŵ",
+        "Çankırı",
+        "—",
+        "...",
+        "123",
+        "Area 51",
+        "北京",
+        "🙂",
+        "",
+        "   ",
+        None,
+    ],
+)
+
+# Languages with and without multi-character exemplars, excluded and invalid codes.
+languages = [
+    ("en", "AFG"),
+    ("en", "TUR"),
+    ("fr", "AFG"),
+    ("es", "AFG"),
+    ("el", "AFG"),
+    ("ru", "AFG"),
+    ("ar", "AFG"),
+    ("ar", "TUN"),
+    ("az", "AFG"),
+    ("bem", "AFG"),
+    ("br", "AFG"),
+    ("hu", "AFG"),
+    ("cy", "AFG"),
+    ("zh", "AFG"),
+    ("not a tag", "AFG"),
+]
+
+
+def is_checked(lang: str, name: str | None) -> bool:
+    """Whether the per-value functions check a name, as they did before."""
+    return (
+        isinstance(name, str)
+        and bool(name.strip())
+        and tag_is_valid(lang)
+        and lang not in exclude_check
+    )
+
+
+def get_invalid_chars_per_value(lang: str, name: str | None, iso3: str) -> str:
+    """Previous per-value implementation of "get_invalid_chars"."""
+    if not is_checked(lang, name):
+        return ""
+    char_set = get_char_set(lang, iso3)
+    return "".join({char for char in name if char not in char_set + punctuation_set})
+
+
+def is_punctuation_per_value(lang: str, name: str | None, iso3: str) -> bool:
+    """Previous per-value implementation of "is_punctuation"."""
+    if not is_checked(lang, name):
+        return False
+    char_set = get_char_set(lang, iso3)
+    return all(char not in char_set for char in name)
+
+
+def is_invalid_per_value(lang: str, name: str | None, iso3: str) -> bool:
+    """Previous per-value implementation of "is_invalid"."""
+    if not is_checked(lang, name):
+        return False
+    char_set = get_char_set(lang, iso3)
+    return any(char not in char_set + punctuation_set for char in name)
+
+
+class TestTableNames:
+    @pytest.mark.parametrize(("lang", "iso3"), languages)
+    def test_invalid_chars(self, lang, iso3):
+        expected = {
+            char
+            for name in names
+            for char in get_invalid_chars_per_value(lang, name, iso3)
+        }
+        assert get_invalid_chars(lang, get_text(names), iso3) == expected
+
+    @pytest.mark.parametrize(("lang", "iso3"), languages)
+    def test_is_invalid(self, lang, iso3):
+        text = get_text(names)
+        expected = [is_invalid_per_value(lang, x, iso3) for x in text]
+        assert is_invalid(lang, text, iso3).tolist() == expected
+
+    @pytest.mark.parametrize(("lang", "iso3"), languages)
+    def test_is_punctuation(self, lang, iso3):
+        text = get_text(names)
+        expected = [is_punctuation_per_value(lang, x, iso3) for x in text]
+        assert is_punctuation(lang, text, iso3).tolist() == expected
+
+    def test_class_single_chars(self):
+        pattern = get_class({"a", "ch", "d"})
+        assert pattern.findall("ache d") == ["a", "d"]
+        assert get_class({"ch"}, negate=True).findall("ch") == ["c", "h"]
@@ -0,0 +1,65 @@
+import pyarrow as pa
+from shapely import Point, Polygon, box, to_wkb
+
+from hdx.scraper.cod_ab.download.verify import POINT, POLYGON
+from hdx.scraper.cod_ab.download.verify import main as verify
+
+
+def get_table(object_ids: list[int], geometries: list | None = None) -> pa.Table:
+    """Gets a downloaded layer of unit squares, or of the geometries given."""
+    if geometries is None:
+        geometries = [box(x, 0, x + 1, 1) for x in object_ids]
+    return pa.table(
+        {
+            "objectid": pa.array(object_ids, pa.int64()),
+            "geometry": pa.array(to_wkb(geometries).tolist(), pa.binary()),
+        },
+    )
+
+
+class TestVerify:
+    def test_keep(self):
+        result = verify(get_table([1, 2, 3]), "objectid", [1, 2, 3], POLYGON)
+        assert result.keep.tolist() == [True, True, True]
+        assert result.refetch == []
+        assert result.is_complete
+
+    def test_missing(self):
+        result = verify(get_table([1, 3]), "objectid", [1, 2, 3, 4], POLYGON)
+        assert result.keep.tolist() == [True, True]
+        assert result.missing == [2, 4]
+        assert result.refetch == [2, 4]
+        assert not result.is_complete
+
+    def test_duplicated(self):
+        result = verify(get_table([1, 2, 2, 3]), "objectid", [1, 2, 3], POLYGON)
+        assert result.keep.tolist() == [True, True, False, True]
+        assert result.duplicated == 1
+        assert result.refetch == []
+        assert not result.is_complete
+
+    def test_unexpected(self):
+        result = verify(get_table([1, 2, 9, 3]), "objectid", [1, 2, 3], POLYGON)
+        assert result.keep.tolist() == [True, True, False, True]
+        assert result.unexpected == 1
+        assert result.refetch == []
+        assert not result.is_complete
+
+    def test_empty(self):
+        geometries = [box(1, 0, 2, 1), Polygon(), None]
+        result = verify(
+            get_table([1, 2, 3], geometries), "objectid", [1, 2, 3], POLYGON
+        )
+        assert result.keep.tolist() == [True, False, False]
+        assert result.empty == [2, 3]
+        assert result.refetch == [2, 3]
+        assert result.wrong_type == 0
+        assert result.is_complete
+
+    def test_wrong_type(self):
+        geometries = [Point(0, 0), box(1, 0, 2, 1)]
+        result = verify(get_table([1, 2], geometries), "objectid", [1, 2], POINT)
+        assert result.keep.tolist() == [True, True]
+        assert result.wrong_type == 1
+        assert result.refetch == []
+        assert not result.is_complete